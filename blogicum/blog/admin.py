@@ -1,10 +1,41 @@
 from django.contrib import admin
+from django.contrib.admin.views.main import ChangeList
+from django.db.models import Q
 
-from .models import Category, Location, Post, Comment
+from .models import Category, Location, Post, Comment, ImageJob
+from .paginators import EstimatedCountPaginator
+from .search import has_index, match_expression, matching_ids
+
+
+class ProjectedChangeList(ChangeList):
+    """Changelist that leaves out the columns listed in list_defer"""
+
+    def get_queryset(self, request):
+        return super().get_queryset(request).defer(
+            *self.model_admin.list_defer
+        )
+
+
+class LargeTableAdmin(admin.ModelAdmin):
+    """Changelist settings for tables with millions of rows.
+
+    Rows come with their related objects in one query, wide columns the
+    list does not show are deferred, and the unfiltered total is
+    estimated instead of counted. Sorting on the primary key reads the
+    index instead of sorting the table.
+    """
+
+    list_defer = ()
+    ordering = ('-pk',)
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+
+    def get_changelist(self, request, **kwargs):
+        return ProjectedChangeList
 
 
 @admin.register(Post)
-class PostAdmin(admin.ModelAdmin):
+class PostAdmin(LargeTableAdmin):
     list_display = (
         'title',
         'pub_date',
@@ -12,6 +43,8 @@ class PostAdmin(admin.ModelAdmin):
         'category',
         'image_tag',
     )
+    list_select_related = ('author', 'category')
+    list_defer = ('text', 'category__description')
     fieldsets = (
         (None, {
             'fields': (
@@ -19,6 +52,7 @@ class PostAdmin(admin.ModelAdmin):
                 'pub_date',
                 'author',
                 'category',
+                'location',
             )
         }),
         ('Image', {
@@ -26,9 +60,22 @@ class PostAdmin(admin.ModelAdmin):
             'fields': ('image',),
         }),
     )
-    search_fields = ('title',)
+    autocomplete_fields = ('author', 'category', 'location')
+    search_fields = ('title', 'text', '=author__username')
     list_filter = ('is_published', 'created_at')
 
+    def get_search_results(self, request, queryset, search_term):
+        """Title and text words looked up in the FTS5 index"""
+        match = match_expression(search_term)
+        if not match or not has_index(queryset.db):
+            return super().get_search_results(
+                request, queryset, search_term
+            )
+        return queryset.filter(
+            Q(pk__in=matching_ids(match))
+            | Q(author__username=search_term.strip())
+        ), False
+
 
 @admin.register(Location)
 class LocationAdmin(admin.ModelAdmin):
@@ -48,11 +95,35 @@ class CategoryAdmin(admin.ModelAdmin):
 
 
 @admin.register(Comment)
-class CommentAdmin(admin.ModelAdmin):
+class CommentAdmin(LargeTableAdmin):
     list_display = (
         'comment',
         'post',
         'author',
     )
-    search_fields = ['author', 'comment']
+    list_select_related = ('post', 'author')
+    list_defer = ('post__text', 'post__image_variants')
+    autocomplete_fields = ('post', 'author')
+    # Only the author: a LIKE over the comment text scans the whole table.
+    search_fields = ('author__username',)
     list_filter = ('created_at',)
+
+    def get_search_results(self, request, queryset, search_term):
+        """Comments of the author with exactly that username"""
+        if not search_term.strip():
+            return queryset, False
+        return queryset.filter(author__username=search_term.strip()), False
+
+
+@admin.register(ImageJob)
+class ImageJobAdmin(admin.ModelAdmin):
+    list_display = (
+        'image',
+        'post',
+        'status',
+        'attempts',
+        'created_at',
+    )
+    list_select_related = ('post',)
+    list_filter = ('status',)
+    readonly_fields = ('post', 'image', 'attempts', 'error', 'locked_at')
@@ -0,0 +1,35 @@
+"""Running the synchronous parts of async views.
+
+Django 3.2 has no async ORM or cache API, so async views hand queries,
+cache calls and template rendering to a bounded pool of threads instead
+of the single thread that sync_to_async uses by default. The pool size
+also caps the database connections the async views hold at once.
+"""
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.db import close_old_connections
+
+executor = ThreadPoolExecutor(
+    max_workers=settings.BLOG_ASYNC_THREADS,
+    thread_name_prefix='blog-async',
+)
+
+
+def _call(func, *args, **kwargs):
+    # Pool threads live outside the request cycle that usually closes
+    # connections, so they apply CONN_MAX_AGE around every call.
+    close_old_connections()
+    try:
+        return func(*args, **kwargs)
+    finally:
+        close_old_connections()
+
+
+async def run_sync(func, *args, **kwargs):
+    """Awaiting a blocking call run in the pool"""
+    return await sync_to_async(
+        partial(_call, func), thread_sensitive=False, executor=executor
+    )(*args, **kwargs)
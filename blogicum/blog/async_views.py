@@ -0,0 +1,139 @@
+"""Coroutine versions of the read-only blog pages, served under ASGI.
+
+The pages render the same templates with the same context as their
+counterparts in blog.views. Queries, cache calls and rendering are
+awaited in the blog.async_utils pool, so a request waiting on the
+database holds no thread of its own. blog.urls routes to these views
+when BLOG_ASYNC_VIEWS is set.
+"""
+import asyncio
+
+from django.http import Http404
+from django.shortcuts import get_object_or_404, render
+
+from blog.async_utils import run_sync
+from blog.caching import (
+    INDEX_LISTING,
+    author_listing,
+    cache_anonymous_page,
+    category_listing,
+    profile_listing
+)
+from blog.forms import CommentForm
+from blog.models import Category, Post
+from blog.replica import read_from_replica
+from blog.utils import (
+    can_view_post,
+    get_profile_posts,
+    get_request,
+    get_user_by_username,
+    paginate_comments,
+    paginate_posts
+)
+from blog.views import COMMENTS_PAGINATOR_NUM, PAGINATOR_NUM
+
+
+def _post_page(request, queryset, listing):
+    """Page of posts with its rows already fetched"""
+    page_obj = paginate_posts(request, queryset, PAGINATOR_NUM, listing)
+    page_obj.object_list = list(page_obj.object_list)
+    return page_obj
+
+
+def _list_context(page_obj):
+    """Context of ListView for a page of posts"""
+    return {
+        'paginator': page_obj.paginator,
+        'page_obj': page_obj,
+        'is_paginated': page_obj.has_other_pages(),
+        'object_list': page_obj.object_list,
+        'post_list': page_obj.object_list,
+    }
+
+
+def _visible_post(request, post_id):
+    """Post the user may read, or 404"""
+    post = get_object_or_404(
+        Post.objects.select_related('category', 'location', 'author'),
+        pk=post_id,
+    )
+    if not can_view_post(request.user, post):
+        raise Http404
+    return post
+
+
+def _profile_page(request, username):
+    """Profile user and their page of posts"""
+    user = get_user_by_username(request, username)
+    page_obj = _post_page(
+        request,
+        get_profile_posts(request, user),
+        author_listing(user.pk, own=user == request.user),
+    )
+    return user, page_obj
+
+
+@read_from_replica
+@cache_anonymous_page(lambda: INDEX_LISTING)
+async def index(request):
+    """Homepage"""
+    page_obj = await run_sync(
+        _post_page, request, get_request().order_by('-pub_date'),
+        INDEX_LISTING
+    )
+    return await run_sync(
+        render, request, 'blog/index.html', _list_context(page_obj)
+    )
+
+
+@read_from_replica
+@cache_anonymous_page(
+    lambda category_slug: category_listing(category_slug)
+)
+async def category_posts(request, category_slug):
+    """Page output category_posts"""
+    category = await run_sync(
+        get_object_or_404, Category, slug=category_slug, is_published=True
+    )
+    page_obj = await run_sync(
+        _post_page,
+        request,
+        get_request().filter(category=category).order_by('-pub_date'),
+        category_listing(category.slug),
+    )
+    return await run_sync(
+        render, request, 'blog/category.html', {'page_obj': page_obj}
+    )
+
+
+@read_from_replica
+async def post_detail(request, post_id):
+    """Post detail.
+
+    The post and its first comments are fetched at the same time, the
+    comments being dropped when the post turns out to be hidden.
+    """
+    post, comments = await asyncio.gather(
+        run_sync(_visible_post, request, post_id),
+        run_sync(
+            paginate_comments, request, Post(pk=post_id),
+            COMMENTS_PAGINATOR_NUM
+        ),
+    )
+    context = {
+        'object': post,
+        'post': post,
+        'form': CommentForm(),
+        'comments': comments,
+    }
+    return await run_sync(render, request, 'blog/detail.html', context)
+
+
+@read_from_replica
+@cache_anonymous_page(profile_listing)
+async def profile(request, username):
+    """Profile page"""
+    user, page_obj = await run_sync(_profile_page, request, username)
+    context = _list_context(page_obj)
+    context['profile'] = user
+    return await run_sync(render, request, 'blog/profile.html', context)
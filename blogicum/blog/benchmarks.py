@@ -0,0 +1,611 @@
+"""In-process benchmark of every blog and pages URL.
+
+Each URL name is requested through the Django test client against the
+current database, so run it on a seeded copy (`manage.py seed_blog`).
+Latency and query counts come from timed runs, peak memory from one
+extra run under tracemalloc so that tracing does not skew the timings.
+
+`throughput` compares the read-only pages served by the WSGI and ASGI
+handlers under many concurrent requests, without a server in between.
+`sqlite_throughput` measures concurrent reads and comment writes on a
+copy of the SQLite database before and after the blog.sqlite profile.
+`comment_throughput` measures sustained comment writes with and without
+the blog.write_queue writer, also on a copy of the database.
+"""
+import asyncio
+import importlib
+import io
+import math
+import random
+import sqlite3
+import sys
+import tempfile
+import threading
+import time
+import tracemalloc
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import ExitStack, contextmanager
+from datetime import datetime
+from functools import partial
+from itertools import cycle, islice
+from pathlib import Path
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.handlers.asgi import ASGIHandler
+from django.core.handlers.wsgi import WSGIHandler
+from django.db import OperationalError, connections, transaction
+from django.test import Client, override_settings
+from django.urls import clear_url_caches, get_resolver, reverse
+
+from blog import write_queue
+from blog.middleware import QueryRecorder
+from blog.models import Comment, Post
+from blog.sqlite import apply_pragmas
+from blog.write_queue import CommentWriter, save_comment
+
+URL_NAMESPACES = ('blog', 'pages')
+# URL names that only make sense for the author of the object.
+AUTHOR_URL_NAMES = {
+    'blog:edit_post',
+    'blog:delete_post',
+    'blog:edit_comment',
+    'blog:delete_comment',
+}
+# URL names behind LoginRequiredMixin.
+LOGIN_URL_NAMES = AUTHOR_URL_NAMES | {
+    'blog:create_post',
+    'blog:add_comment',
+    'blog:edit_profile',
+}
+# Client host accepted by settings.ALLOWED_HOSTS outside of tests.
+SERVER_NAME = '127.0.0.1'
+# Pages that have coroutine versions in blog.async_views.
+THROUGHPUT_URL_NAMES = (
+    'blog:index',
+    'blog:category_posts',
+    'blog:post_detail',
+    'blog:profile',
+)
+# Handler and whether the coroutine views are routed, by server mode.
+SERVER_MODES = {
+    'wsgi': ('wsgi', False),
+    'asgi-sync': ('asgi', False),
+    'asgi': ('asgi', True),
+}
+# Connection profiles compared by `sqlite_throughput`. 'before' is the
+# bare configuration: rollback journal and a connection per request.
+SQLITE_PROFILES = {
+    'before': {
+        'pragmas': {'journal_mode': 'delete', 'synchronous': 'full'},
+        'persistent': False,
+    },
+    'after': {'pragmas': None, 'persistent': True},
+}
+# Comment write paths compared by `comment_throughput`: a transaction per
+# comment, as CommentCreateViews did before blog.write_queue, or the writer.
+COMMENT_MODES = ('direct', 'queued')
+BENCHMARK_COMMENT = 'Benchmark comment'
+SQLITE_READS = (
+    'SELECT id, title, text, pub_date FROM blog_post WHERE is_visible '
+    'ORDER BY pub_date DESC LIMIT 10',
+    'SELECT id, comment, author_id, created_at FROM blog_comment '
+    'WHERE post_id = ? ORDER BY created_at, id LIMIT 50',
+)
+SQLITE_WRITES = (
+    'INSERT INTO blog_comment (comment, post_id, author_id, created_at) '
+    'VALUES (?, ?, ?, ?)',
+    'UPDATE blog_post SET comment_count = comment_count + 1 WHERE id = ?',
+)
+
+
+def percentile(samples, percent):
+    """Nearest-rank percentile of a non-empty list"""
+    ordered = sorted(samples)
+    rank = max(math.ceil(percent / 100 * len(ordered)), 1)
+    return ordered[rank - 1]
+
+
+def url_names():
+    """Every named route of the blog and pages applications"""
+    resolver = get_resolver()
+    names = []
+    for namespace in URL_NAMESPACES:
+        _, sub_resolver = resolver.namespace_dict[namespace]
+        names.extend(
+            f'{namespace}:{pattern.name}'
+            for pattern in sub_resolver.url_patterns
+            if pattern.name
+        )
+    return names
+
+
+def sample_kwargs():
+    """URL kwargs and users taken from visible rows of the database"""
+    post = Post.objects.select_related('category', 'author').filter(
+        is_visible=True, category__is_published=True
+    ).order_by('-comment_count', '-pk').first()
+    if post is None:
+        return None, None
+    comment = Comment.objects.select_related('author').filter(
+        post=post
+    ).first()
+    kwargs = {
+        'post_id': post.pk,
+        'category_slug': post.category.slug,
+        'username': post.author.username,
+    }
+    users = {'post': post.author}
+    if comment is not None:
+        kwargs['comment_id'] = comment.pk
+        users['comment'] = comment.author
+    return kwargs, users
+
+
+def build_targets():
+    """(url name, url, user) for every route that can be filled in.
+
+    Routes whose kwargs cannot be taken from the database, e.g. comment
+    pages on a database without comments, are returned as skipped.
+    """
+    kwargs, users = sample_kwargs()
+    targets, skipped = [], []
+    for name in url_names():
+        pattern_kwargs = _pattern_kwargs(name)
+        if kwargs is None or not pattern_kwargs <= kwargs.keys():
+            skipped.append(name)
+            continue
+        user = None
+        if name in LOGIN_URL_NAMES:
+            user = users['comment' if 'comment_id' in pattern_kwargs
+                         else 'post']
+        url = reverse(name, kwargs={key: kwargs[key]
+                                    for key in pattern_kwargs})
+        targets.append((name, url, user))
+    return targets, skipped
+
+
+def _pattern_kwargs(name):
+    namespace, url_name = name.split(':')
+    _, sub_resolver = get_resolver().namespace_dict[namespace]
+    for pattern in sub_resolver.url_patterns:
+        if pattern.name == url_name:
+            return set(pattern.pattern.converters)
+    return set()
+
+
+def _client(user):
+    client = Client(SERVER_NAME=SERVER_NAME)
+    if user is not None:
+        client.force_login(user)
+    return client
+
+
+def _timed_get(client, url):
+    recorder = QueryRecorder()
+    with ExitStack() as stack:
+        for alias in connections:
+            stack.enter_context(connections[alias].execute_wrapper(recorder))
+        start = time.perf_counter()
+        response = client.get(url)
+        elapsed = time.perf_counter() - start
+    return response, elapsed, recorder.count
+
+
+def run(requests=50, warmup=2, cold_cache=False):
+    """Benchmark every URL name, returning results keyed by it"""
+    targets, skipped = build_targets()
+    results = {}
+    for name, url, user in targets:
+        client = _client(user)
+        for _ in range(warmup):
+            client.get(url)
+        latencies, queries = [], []
+        status = None
+        for _ in range(requests):
+            if cold_cache:
+                cache.clear()
+            response, elapsed, count = _timed_get(client, url)
+            status = response.status_code
+            latencies.append(elapsed * 1000)
+            queries.append(count)
+
+        if cold_cache:
+            cache.clear()
+        tracemalloc.start()
+        try:
+            client.get(url)
+            _, peak = tracemalloc.get_traced_memory()
+        finally:
+            tracemalloc.stop()
+
+        results[name] = {
+            'url': url,
+            'status': status,
+            'requests': requests,
+            'p50_ms': round(percentile(latencies, 50), 3),
+            'p95_ms': round(percentile(latencies, 95), 3),
+            'p99_ms': round(percentile(latencies, 99), 3),
+            'queries': max(queries),
+            'peak_kb': round(peak / 1024, 1),
+        }
+    return {'results': results, 'skipped': skipped}
+
+
+def compare(results, baseline, tolerance=0.2):
+    """Regressions against a baseline: slower p95 beyond the tolerance,
+    more queries or more memory beyond the tolerance"""
+    regressions = []
+    for name, current in results['results'].items():
+        previous = baseline.get('results', {}).get(name)
+        if previous is None:
+            continue
+        if current['queries'] > previous['queries']:
+            regressions.append(
+                f'{name}: {current["queries"]} queries, '
+                f'baseline {previous["queries"]}'
+            )
+        for metric in ('p95_ms', 'peak_kb'):
+            if current[metric] > previous[metric] * (1 + tolerance):
+                regressions.append(
+                    f'{name}: {metric} {current[metric]}, '
+                    f'baseline {previous[metric]}'
+                )
+    return regressions
+
+
+def _reload_urls():
+    importlib.reload(importlib.import_module('blog.urls'))
+    importlib.reload(importlib.import_module(settings.ROOT_URLCONF))
+    clear_url_caches()
+
+
+@contextmanager
+def blog_views(async_views):
+    """URLconf routing the read-only pages to the sync or async views"""
+    try:
+        with override_settings(BLOG_ASYNC_VIEWS=async_views):
+            _reload_urls()
+            yield
+    finally:
+        _reload_urls()
+
+
+def _wsgi_get(handler, url):
+    path, _, query = url.partition('?')
+    statuses = []
+
+    def start_response(status, headers, exc_info=None):
+        statuses.append(int(status.split()[0]))
+
+    response = handler({
+        'REQUEST_METHOD': 'GET',
+        'SCRIPT_NAME': '',
+        'PATH_INFO': path,
+        'QUERY_STRING': query,
+        'SERVER_NAME': SERVER_NAME,
+        'SERVER_PORT': '80',
+        'SERVER_PROTOCOL': 'HTTP/1.1',
+        'wsgi.version': (1, 0),
+        'wsgi.url_scheme': 'http',
+        'wsgi.input': io.BytesIO(),
+        'wsgi.errors': sys.stderr,
+        'wsgi.multithread': True,
+        'wsgi.multiprocess': False,
+        'wsgi.run_once': False,
+    }, start_response)
+    try:
+        b''.join(response)
+    finally:
+        response.close()
+    return statuses[0]
+
+
+async def _asgi_get(handler, url):
+    path, _, query = url.partition('?')
+    messages = []
+
+    async def receive():
+        return {'type': 'http.request', 'body': b'', 'more_body': False}
+
+    async def send(message):
+        messages.append(message)
+
+    await handler({
+        'type': 'http',
+        'asgi': {'version': '3.0'},
+        'http_version': '1.1',
+        'method': 'GET',
+        'scheme': 'http',
+        'path': path,
+        'root_path': '',
+        'query_string': query.encode(),
+        'headers': [(b'host', SERVER_NAME.encode())],
+        'server': (SERVER_NAME, 80),
+    }, receive, send)
+    return messages[0]['status']
+
+
+def _timed(get, handler, url):
+    start = time.perf_counter()
+    status = get(handler, url)
+    return status, time.perf_counter() - start
+
+
+def _run_wsgi(urls, requests, concurrency):
+    """(status, seconds) of requests sent from a pool of client threads"""
+    handler = WSGIHandler()
+    with ThreadPoolExecutor(concurrency) as pool:
+        return list(pool.map(
+            partial(_timed, _wsgi_get, handler),
+            islice(cycle(urls), requests),
+        ))
+
+
+async def _serve_asgi(urls, requests, concurrency):
+    handler = ASGIHandler()
+    pending = islice(cycle(urls), requests)
+    samples = []
+
+    async def client():
+        for url in pending:
+            start = time.perf_counter()
+            status = await _asgi_get(handler, url)
+            samples.append((status, time.perf_counter() - start))
+
+    await asyncio.gather(*(client() for _ in range(concurrency)))
+    return samples
+
+
+def _run_asgi(urls, requests, concurrency):
+    """(status, seconds) of requests sent from concurrent coroutines"""
+    return asyncio.run(_serve_asgi(urls, requests, concurrency))
+
+
+def throughput(requests=500, concurrency=64, modes=tuple(SERVER_MODES),
+               cold_cache=False):
+    """Requests per second of the read-only pages in each server mode.
+
+    Anonymous requests cycle over the pages of THROUGHPUT_URL_NAMES with
+    `concurrency` of them in flight at a time. With `cold_cache` pages
+    are not kept in the page cache, so every request reaches the views.
+    """
+    kwargs, _ = sample_kwargs()
+    if kwargs is None:
+        return {}
+    urls = [
+        reverse(name, kwargs={key: kwargs[key]
+                              for key in _pattern_kwargs(name)})
+        for name in THROUGHPUT_URL_NAMES
+    ]
+    results = {}
+    with ExitStack() as stack:
+        if cold_cache:
+            stack.enter_context(override_settings(BLOG_PAGE_CACHE_TIMEOUT=0))
+        for mode in modes:
+            interface, async_views = SERVER_MODES[mode]
+            serve = _run_wsgi if interface == 'wsgi' else _run_asgi
+            with blog_views(async_views):
+                serve(urls, len(urls), 1)
+                start = time.perf_counter()
+                samples = serve(urls, requests, concurrency)
+                elapsed = time.perf_counter() - start
+            latencies = [seconds * 1000 for _, seconds in samples]
+            results[mode] = {
+                'requests': requests,
+                'concurrency': concurrency,
+                'errors': sum(status != 200 for status, _ in samples),
+                'rps': round(requests / elapsed, 1),
+                'p50_ms': round(percentile(latencies, 50), 3),
+                'p95_ms': round(percentile(latencies, 95), 3),
+                'p99_ms': round(percentile(latencies, 99), 3),
+            }
+    return results
+
+
+def _sqlite_read(db, post_id, author_id):
+    db.execute(SQLITE_READS[0]).fetchall()
+    db.execute(SQLITE_READS[1], (post_id,)).fetchall()
+
+
+def _sqlite_write(db, post_id, author_id):
+    """Comment insert and counter update in one transaction, as in
+    CommentCreateViews"""
+    db.execute('BEGIN')
+    try:
+        db.execute(SQLITE_WRITES[0], (
+            BENCHMARK_COMMENT, post_id, author_id,
+            datetime.utcnow().isoformat(' '),
+        ))
+        db.execute(SQLITE_WRITES[1], (post_id,))
+        db.execute('COMMIT')
+    except sqlite3.Error:
+        db.execute('ROLLBACK')
+        raise
+
+
+def _sqlite_client(path, profile, operation, posts, deadline, stats):
+    """Running an operation until the deadline, recording (seconds,
+    locked) samples"""
+    def connect():
+        db = sqlite3.connect(path, isolation_level=None)
+        apply_pragmas(db, profile['pragmas'])
+        return db
+
+    db = connect() if profile['persistent'] else None
+    while time.perf_counter() < deadline:
+        start = time.perf_counter()
+        own = db
+        try:
+            own = own or connect()
+            operation(own, *random.choice(posts))
+            stats.append((time.perf_counter() - start, False))
+        except sqlite3.OperationalError:
+            stats.append((time.perf_counter() - start, True))
+        finally:
+            if own is not None and own is not db:
+                own.close()
+    if db is not None:
+        db.close()
+
+
+def _sqlite_summary(stats, duration):
+    done = [seconds * 1000 for seconds, locked in stats if not locked]
+    return {
+        'per_second': round(len(done) / duration, 1),
+        'p95_ms': round(percentile(done, 95), 3) if done else None,
+        'locked': sum(locked for _, locked in stats),
+    }
+
+
+def sqlite_throughput(duration=5.0, readers=8, writers=4, using='default'):
+    """Reads and comment writes per second under each SQLite profile.
+
+    Each profile runs on a fresh copy of the database, with `readers`
+    threads loading the feed and a comment page and `writers` threads
+    posting comments, all at once for `duration` seconds. Writes that
+    fail with "database is locked" are counted separately.
+    """
+    source = str(connections[using].settings_dict['NAME'])
+    with tempfile.TemporaryDirectory() as directory:
+        path = str(Path(directory) / 'bench.sqlite3')
+        results = {}
+        for name, profile in SQLITE_PROFILES.items():
+            profile = dict(profile)
+            if profile['pragmas'] is None:
+                profile['pragmas'] = settings.BLOG_SQLITE_PRAGMAS
+            src = sqlite3.connect(source, uri=True)
+            dst = sqlite3.connect(path)
+            try:
+                src.backup(dst)
+                # The copy keeps the journal mode of the source; switching
+                # it while the clients are connected would fail.
+                apply_pragmas(dst, profile['pragmas'])
+                posts = dst.execute(
+                    'SELECT id, author_id FROM blog_post WHERE is_visible '
+                    'ORDER BY id DESC LIMIT 100'
+                ).fetchall()
+            finally:
+                src.close()
+                dst.close()
+            if not posts:
+                return {}
+            read_stats, write_stats = [], []
+            deadline = time.perf_counter() + duration
+            threads = [
+                threading.Thread(target=_sqlite_client, args=(
+                    path, profile, operation, posts, deadline, stats
+                ))
+                for count, operation, stats in (
+                    (readers, _sqlite_read, read_stats),
+                    (writers, _sqlite_write, write_stats),
+                )
+                for _ in range(count)
+            ]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+            results[name] = {
+                'reads': _sqlite_summary(read_stats, duration),
+                'writes': _sqlite_summary(write_stats, duration),
+            }
+            Path(path).unlink()
+            for suffix in ('-wal', '-shm', '-journal'):
+                Path(path + suffix).unlink(missing_ok=True)
+    return results
+
+
+@contextmanager
+def database_copy(using='default'):
+    """Pointing `using` at a temporary copy of its database, for the
+    connections opened by any thread inside the block"""
+    settings_dict = connections[using].settings_dict
+    source = settings_dict['NAME']
+    with tempfile.TemporaryDirectory() as directory:
+        path = str(Path(directory) / 'bench.sqlite3')
+        src = sqlite3.connect(str(source), uri=True)
+        dst = sqlite3.connect(path)
+        try:
+            src.backup(dst)
+        finally:
+            src.close()
+            dst.close()
+        connections[using].close()
+        settings_dict['NAME'] = path
+        try:
+            yield path
+        finally:
+            connections[using].close()
+            settings_dict['NAME'] = source
+
+
+def _save_direct(comment):
+    with transaction.atomic():
+        comment.save()
+
+
+def _comment_client(save, posts, deadline, stats):
+    """Posting comments until the deadline, recording (seconds, locked)
+    samples"""
+    try:
+        while time.perf_counter() < deadline:
+            post_id, author_id = random.choice(posts)
+            start = time.perf_counter()
+            try:
+                save(Comment(
+                    comment=BENCHMARK_COMMENT,
+                    post_id=post_id,
+                    author_id=author_id,
+                ))
+                stats.append((time.perf_counter() - start, False))
+            except OperationalError:
+                stats.append((time.perf_counter() - start, True))
+    finally:
+        connections.close_all()
+
+
+def comment_throughput(duration=5.0, clients=16, modes=COMMENT_MODES):
+    """Comments per second sustained by concurrent clients in each mode.
+
+    The comments are written to a copy of the database, dropped once
+    measured, through a writer of their own in the queued mode. Their
+    cache purges go to a dummy cache instead of the pages of the site.
+    """
+    results = {}
+    with database_copy(), override_settings(CACHES={
+        'default': {'BACKEND': 'django.core.cache.backends.dummy.DummyCache'}
+    }):
+        posts = list(Post.objects.filter(
+            is_visible=True, category__is_published=True
+        ).order_by('-pk').values_list('pk', 'author_id')[:100])
+        if not posts:
+            return {}
+        site_writer = write_queue.writer
+        for mode in modes:
+            save = save_comment if mode == 'queued' else _save_direct
+            writer = write_queue.writer = CommentWriter()
+            stats = []
+            deadline = time.perf_counter() + duration
+            try:
+                with override_settings(BLOG_WRITE_QUEUE=mode == 'queued'):
+                    threads = [
+                        threading.Thread(
+                            target=_comment_client,
+                            args=(save, posts, deadline, stats),
+                        )
+                        for _ in range(clients)
+                    ]
+                    for thread in threads:
+                        thread.start()
+                    for thread in threads:
+                        thread.join()
+            finally:
+                writer.stop()
+                write_queue.writer = site_writer
+            results[mode] = _sqlite_summary(stats, duration)
+            if writer.batches:
+                results[mode]['per_batch'] = round(
+                    writer.written / writer.batches, 1
+                )
+    return results
@@ -0,0 +1,29 @@
+"""Cache shared by the processes of one host.
+
+Pages and post cards are purged by whichever process changes a post: a
+web worker, `publish_scheduled` or the image worker. The cache therefore
+has to live outside the processes, unlike LocMemCache. SharedFileCache
+keeps the entries as files in a directory every process can reach;
+sites spread over several hosts point CACHES at Memcached instead.
+"""
+import random
+
+from django.core.cache.backends.filebased import FileBasedCache
+
+
+class SharedFileCache(FileBasedCache):
+    """FileBasedCache culling on one set out of CULL_EVERY.
+
+    FileBasedCache lists the whole directory on every set to enforce
+    MAX_ENTRIES, which costs more than the set itself once the cache
+    holds thousands of pages and cards.
+    """
+
+    def __init__(self, dir, params):
+        super().__init__(dir, params)
+        options = params.get('OPTIONS', {})
+        self._cull_every = int(options.get('CULL_EVERY', 100))
+
+    def _cull(self):
+        if random.randrange(self._cull_every) == 0:
+            super()._cull()
@@ -0,0 +1,277 @@
+import asyncio
+import hashlib
+import time
+from collections import namedtuple
+from functools import wraps
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.template.loader import render_to_string
+from django.utils.safestring import mark_safe
+
+from blog.async_utils import run_sync
+from blog.replica import replica_behind
+
+COUNT_GENERATION_KEY = 'blog:count:generation'
+POST_CARD_TEMPLATE = 'includes/post_card.html'
+INDEX_LISTING = 'index'
+CACHEABLE_PAGE_METHODS = ('GET', 'HEAD')
+
+PostListings = namedtuple(
+    'PostListings', ('category_slug', 'author_id', 'author_username')
+)
+
+
+def category_listing(slug):
+    """Listing name of a category feed"""
+    return f'category:{slug}'
+
+
+def author_listing(author_id, own=False):
+    """Listing name of a profile feed, as seen by its owner or the public"""
+    return f'author:{author_id}:{"own" if own else "public"}'
+
+
+def profile_listing(username):
+    """Listing name of the public pages of a profile"""
+    return f'profile:{username}'
+
+
+def _new_generation():
+    # Seeded from the clock so that an evicted generation never resumes
+    # at a value whose keys may still be cached.
+    return int(time.time())
+
+
+def _count_generation():
+    generation = cache.get(COUNT_GENERATION_KEY)
+    if generation is None:
+        cache.add(COUNT_GENERATION_KEY, _new_generation(), None)
+        generation = cache.get(COUNT_GENERATION_KEY, 0)
+    return generation
+
+
+def count_key(listing):
+    """Cache key of the total number of posts in a listing"""
+    return f'blog:count:{_count_generation()}:{listing}'
+
+
+def get_listing_count(listing, compute):
+    """Cached total of a listing, computed on a miss"""
+    key = count_key(listing)
+    count = cache.get(key)
+    if count is None:
+        count = compute()
+        cache.set(key, count, settings.BLOG_COUNT_CACHE_TIMEOUT)
+    return count
+
+
+def invalidate_post_counts(*states):
+    """Forget the totals of listings that contain the given post states.
+
+    Both the old and the new PostListings of an edited post have to be
+    passed.
+    """
+    listings = {INDEX_LISTING}
+    for state in states:
+        if state.category_slug is not None:
+            listings.add(category_listing(state.category_slug))
+        listings.add(author_listing(state.author_id))
+        listings.add(author_listing(state.author_id, own=True))
+    cache.delete_many([count_key(listing) for listing in listings])
+
+
+def invalidate_all_counts():
+    """Forget every cached total at once, e.g. after a category change"""
+    try:
+        cache.incr(COUNT_GENERATION_KEY)
+    except ValueError:
+        cache.set(COUNT_GENERATION_KEY, _new_generation(), None)
+
+
+def _version_key(label, pk):
+    return f'blog:version:{label}:{pk}'
+
+
+def bump_version(instance):
+    """Retiring every fragment rendered from the previous state of a row.
+
+    Done at once for renders inside the writing transaction, and again
+    once it commits for cards that other requests rendered from the old
+    row in the meantime.
+    """
+    key = _version_key(instance._meta.label_lower, instance.pk)
+    cache.set(key, time.time_ns(), None)
+    transaction.on_commit(lambda: cache.set(key, time.time_ns(), None))
+
+
+def bump_versions(model, pks):
+    """bump_version for rows written in bulk, without model signals"""
+    keys = [_version_key(model._meta.label_lower, pk) for pk in pks]
+    transaction.on_commit(
+        lambda: cache.set_many(dict.fromkeys(keys, time.time_ns()), None)
+    )
+
+
+def _card_version_keys(post):
+    keys = [_version_key('blog.post', post.pk)]
+    for field in ('category', 'location', 'author'):
+        related_id = getattr(post, f'{field}_id')
+        if related_id is not None:
+            label = post._meta.get_field(field).related_model._meta
+            keys.append(_version_key(label.label_lower, related_id))
+    return keys
+
+
+def _get_versions(keys):
+    versions = cache.get_many(keys)
+    missing = set(keys) - versions.keys()
+    if missing:
+        for key in missing:
+            cache.add(key, time.time_ns(), None)
+        versions.update(cache.get_many(missing))
+    return versions
+
+
+def card_key(post, versions):
+    """Cache key of a rendered card for the current state of its rows"""
+    token = ':'.join(
+        str(versions.get(key)) for key in _card_version_keys(post)
+    )
+    digest = hashlib.md5(token.encode()).hexdigest()
+    return f'blog:card:{post.pk}:{post.comment_count}:{digest}'
+
+
+def render_post_cards(posts):
+    """Rendered post cards, taken from the cache where possible.
+
+    Cards do not depend on the viewer, so a listing costs two cache
+    round trips plus rendering of the cards whose rows changed.
+    """
+    posts = list(posts)
+    versions = _get_versions(
+        list({key for post in posts for key in _card_version_keys(post)})
+    )
+    keys = [card_key(post, versions) for post in posts]
+    cards = cache.get_many(keys)
+    rendered = {}
+    stored = {}
+    for post, key in zip(posts, keys):
+        if key not in cards:
+            rendered[key] = render_to_string(
+                POST_CARD_TEMPLATE, {'post': post}
+            )
+            if not any(
+                replica_behind(versions[version_key])
+                for version_key in _card_version_keys(post)
+            ):
+                stored[key] = rendered[key]
+    if stored:
+        cache.set_many(stored, settings.BLOG_CARD_CACHE_TIMEOUT)
+    cards.update(rendered)
+    return [mark_safe(cards[key]) for key in keys]
+
+
+def _page_version_key(listing):
+    return f'blog:page:version:{listing}'
+
+
+def _page_version(listing):
+    version_key = _page_version_key(listing)
+    return _get_versions([version_key])[version_key]
+
+
+def page_key(listing, request, version=None):
+    """Cache key of a page for the current version of its listing"""
+    if version is None:
+        version = _page_version(listing)
+    digest = hashlib.md5(request.get_full_path().encode()).hexdigest()
+    return f'blog:page:{listing}:{version}:{digest}'
+
+
+def purge_pages(*listings):
+    """Retiring every cached page of the given listings, any query string"""
+    cache.set_many(
+        {_page_version_key(listing): time.time_ns() for listing in listings},
+        None,
+    )
+
+
+def purge_post_pages(*states):
+    """Retiring the pages that show a post in any of the given states"""
+    listings = {INDEX_LISTING}
+    for state in states:
+        if state.category_slug is not None:
+            listings.add(category_listing(state.category_slug))
+        if state.author_username is not None:
+            listings.add(profile_listing(state.author_username))
+    purge_pages(*listings)
+
+
+def _cached_page(get_listing, request, kwargs):
+    """(cache key, cached response) of a request the page cache serves,
+    (None, None) for requests it does not. The key is None as well when
+    the page would be rendered from a replica older than its version."""
+    if (
+        request.method not in CACHEABLE_PAGE_METHODS
+        or request.user.is_authenticated
+    ):
+        return None, None
+    listing = get_listing(**kwargs)
+    version = _page_version(listing)
+    key = page_key(listing, request, version)
+    response = cache.get(key)
+    if replica_behind(version):
+        key = None
+    return key, response
+
+
+def _store_page(key, response):
+    """Caching a fresh 200 response, once rendered"""
+    if response.status_code != 200 or response.streaming or response.cookies:
+        return
+
+    def store(response):
+        cache.set(key, response, settings.BLOG_PAGE_CACHE_TIMEOUT)
+
+    if callable(getattr(response, 'render', None)):
+        response.add_post_render_callback(store)
+    else:
+        store(response)
+
+
+def cache_anonymous_page(get_listing):
+    """Serving a view to anonymous visitors from the page cache.
+
+    `get_listing` maps the URL kwargs of the view to the listing whose
+    purge retires the page, so writes drop exactly the affected pages.
+    Coroutine views get a coroutine wrapper that does the cache work and
+    the session user lookup in the blog.async_utils pool.
+    """
+    def decorator(view):
+        if asyncio.iscoroutinefunction(view):
+            @wraps(view)
+            async def async_wrapper(request, *args, **kwargs):
+                key, response = await run_sync(
+                    _cached_page, get_listing, request, kwargs
+                )
+                if response is not None:
+                    return response
+                response = await view(request, *args, **kwargs)
+                if key is not None:
+                    await run_sync(_store_page, key, response)
+                return response
+            return async_wrapper
+
+        @wraps(view)
+        def wrapper(request, *args, **kwargs):
+            key, response = _cached_page(get_listing, request, kwargs)
+            if response is not None:
+                return response
+            response = view(request, *args, **kwargs)
+            if key is not None:
+                _store_page(key, response)
+            return response
+        return wrapper
+    return decorator
@@ -0,0 +1,205 @@
+"""Resized variants of post images.
+
+Every uploaded Post.image gets a downscaled copy per entry of
+settings.BLOG_IMAGE_VARIANTS, stored next to the original as
+`<name>.<variant>.<ext>`. Their names and pixel sizes are kept in
+Post.image_variants so templates can emit srcset, width and height
+without opening any file. Variants are re-encoded without the EXIF
+data and other metadata of the upload, and so is the original once
+processed: the GPS position of a photo must not be downloadable.
+"""
+import logging
+import os
+from io import BytesIO
+from pathlib import PurePosixPath
+
+import django
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.db import connections
+from django.db.models import Q
+from PIL import Image, ImageOps
+
+logger = logging.getLogger('blog.images')
+
+JPEG_QUALITY = 85
+# The original is re-encoded once, close to the quality of the upload.
+ORIGINAL_QUALITY = 95
+# Image.info entries that may tell who took a photo, with what and where.
+METADATA_KEYS = ('exif', 'xmp', 'XML:com.adobe.xmp', 'comment', 'photoshop')
+# Image.info entries the re-encoded original keeps.
+KEPT_INFO_KEYS = ('icc_profile', 'transparency', 'dpi')
+# Thumbnail for the admin changelist, too small for any srcset.
+ADMIN_VARIANT = 'admin'
+
+
+def init_worker():
+    """Process pool initializer: sets up Django where workers are not
+    forked, and drops the connections a forked worker inherited"""
+    django.setup()
+    # SQLite handles must not be used, or closed, across a fork.
+    for connection in connections.all():
+        connection.connection = None
+
+
+def variant_name(name, variant, extension):
+    """Storage name of a variant, next to the original file"""
+    path = PurePosixPath(name)
+    return str(path.with_name(f'{path.stem}.{variant}{extension}'))
+
+
+def _encode(image):
+    """Image as (bytes, extension): PNG when it has transparency"""
+    buffer = BytesIO()
+    if image.mode in ('RGBA', 'LA') or 'transparency' in image.info:
+        image.save(buffer, 'PNG', optimize=True)
+        return buffer.getvalue(), '.png'
+    if image.mode != 'RGB':
+        image = image.convert('RGB')
+    image.save(
+        buffer, 'JPEG', quality=JPEG_QUALITY, optimize=True, progressive=True
+    )
+    return buffer.getvalue(), '.jpg'
+
+
+def generate_variants(name, only=None, storage=default_storage):
+    """Store the variants of an image, all of them unless `only` names
+    some, returning their descriptions.
+
+    An image that cannot be read yields no variants and templates fall
+    back to the original file.
+    """
+    try:
+        with storage.open(name) as source:
+            original = Image.open(source)
+            original.load()
+    except OSError as error:
+        logger.warning('Cannot read image %s: %s', name, error)
+        return {}
+    original = ImageOps.exif_transpose(original)
+    variants = {}
+    for variant, size in settings.BLOG_IMAGE_VARIANTS.items():
+        if only is not None and variant not in only:
+            continue
+        image = original.copy()
+        image.thumbnail(size, Image.LANCZOS)
+        content, extension = _encode(image)
+        stored = storage.save(
+            variant_name(name, variant, extension), ContentFile(content)
+        )
+        variants[variant] = {
+            'name': stored,
+            'width': image.width,
+            'height': image.height,
+        }
+    return variants
+
+
+def strip_metadata(name, storage=default_storage):
+    """Re-encode the original image in place when it carries metadata.
+
+    Animated images and formats Pillow cannot write back are left as
+    they are; unreadable ones are reported by generate_variants.
+    """
+    try:
+        with storage.open(name) as source:
+            image = Image.open(source)
+            image.load()
+    except OSError:
+        return
+    if (
+        not any(key in image.info for key in METADATA_KEYS)
+        or getattr(image, 'is_animated', False)
+        or image.format not in ('JPEG', 'MPO', 'PNG', 'WEBP')
+    ):
+        return
+    image_format = 'JPEG' if image.format == 'MPO' else image.format
+    kept = {
+        key: image.info[key] for key in KEPT_INFO_KEYS if key in image.info
+    }
+    image = ImageOps.exif_transpose(image)
+    image.info = kept
+    buffer = BytesIO()
+    image.save(
+        buffer, image_format, quality=ORIGINAL_QUALITY,
+        icc_profile=kept.get('icc_profile'),
+    )
+    _replace(name, ContentFile(buffer.getvalue()), storage)
+
+
+def _replace(name, content, storage):
+    """Overwrite a stored file, keeping the old one until the new content
+    is stored in full"""
+    temp = storage.save(
+        variant_name(name, 'tmp', PurePosixPath(name).suffix), content
+    )
+    try:
+        os.replace(storage.path(temp), storage.path(name))
+        return
+    except NotImplementedError:
+        pass
+    # Storages without local files cannot rename: the original goes once
+    # its replacement is safely stored under the temporary name.
+    storage.delete(name)
+    with storage.open(temp) as source:
+        stored = storage.save(name, source)
+    if stored != name:
+        raise OSError(f'Cannot replace {name}, stored as {stored}')
+    storage.delete(temp)
+
+
+def process_upload(name, storage=default_storage):
+    """Strip the metadata of an uploaded image and store its variants"""
+    strip_metadata(name, storage)
+    return generate_variants(name, storage=storage)
+
+
+def delete_variants(variants, storage=default_storage):
+    """Remove the stored files of previously generated variants"""
+    for variant in variants.values():
+        storage.delete(variant['name'])
+
+
+def missing_variants():
+    """Q of posts lacking any of the configured variants"""
+    missing = Q()
+    for variant in settings.BLOG_IMAGE_VARIANTS:
+        missing |= ~Q(image_variants__has_key=variant)
+    return missing
+
+
+def admin_thumbnail(post, storage=default_storage):
+    """Admin thumbnail of a post image as (url, width, height).
+
+    Generated on first use for images the worker has not reached yet;
+    replacing the image or deleting the post removes it with the other
+    variants.
+    """
+    variants = post.image_variants
+    if ADMIN_VARIANT not in variants:
+        thumbnail = generate_variants(post.image.name, {ADMIN_VARIANT})
+        if not thumbnail:
+            return post.image.url, None, None
+        variants = {**variants, **thumbnail}
+        post.image_variants = variants
+        type(post).objects.filter(
+            pk=post.pk, image=post.image.name
+        ).update(image_variants=variants)
+    thumbnail = variants[ADMIN_VARIANT]
+    return (
+        storage.url(thumbnail['name']), thumbnail['width'],
+        thumbnail['height'],
+    )
+
+
+def srcset(variants, storage=default_storage):
+    """srcset attribute value listing the variants by width"""
+    candidates = {
+        variant['width']: storage.url(variant['name'])
+        for name, variant in variants.items()
+        if name != ADMIN_VARIANT
+    }
+    return ', '.join(
+        f'{url} {width}w' for width, url in sorted(candidates.items())
+    )
@@ -0,0 +1,75 @@
+import json
+from pathlib import Path
+
+from django.core.management.base import BaseCommand, CommandError
+
+from blog import benchmarks
+
+
+class Command(BaseCommand):
+    help = (
+        'Benchmark every blog and pages URL in-process: latency '
+        'percentiles, queries per request and peak memory'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--requests', type=int, default=50,
+            help='Timed requests per URL name.',
+        )
+        parser.add_argument(
+            '--warmup', type=int, default=2,
+            help='Untimed requests per URL name before timing.',
+        )
+        parser.add_argument(
+            '--cold-cache', action='store_true',
+            help='Clear the cache before every request.',
+        )
+        parser.add_argument(
+            '--output', type=Path,
+            help='Write the results as JSON to this file.',
+        )
+        parser.add_argument(
+            '--baseline', type=Path,
+            help='Fail on regressions against these stored results.',
+        )
+        parser.add_argument(
+            '--tolerance', type=float, default=0.2,
+            help='Allowed relative slowdown against the baseline.',
+        )
+
+    def handle(self, *args, **options):
+        results = benchmarks.run(
+            requests=options['requests'],
+            warmup=options['warmup'],
+            cold_cache=options['cold_cache'],
+        )
+        self.stdout.write(
+            f'{"url name":<24}{"status":>7}{"p50 ms":>10}{"p95 ms":>10}'
+            f'{"p99 ms":>10}{"queries":>9}{"peak kb":>10}'
+        )
+        for name, row in results['results'].items():
+            self.stdout.write(
+                f'{name:<24}{row["status"]:>7}{row["p50_ms"]:>10}'
+                f'{row["p95_ms"]:>10}{row["p99_ms"]:>10}'
+                f'{row["queries"]:>9}{row["peak_kb"]:>10}'
+            )
+        for name in results['skipped']:
+            self.stdout.write(self.style.WARNING(
+                f'{name}: skipped, no sample data'
+            ))
+        if options['output']:
+            options['output'].write_text(json.dumps(results, indent=2))
+        if options['baseline']:
+            baseline = json.loads(options['baseline'].read_text())
+            regressions = benchmarks.compare(
+                results, baseline, options['tolerance']
+            )
+            if regressions:
+                raise CommandError(
+                    'Regressions against the baseline:\n'
+                    + '\n'.join(regressions)
+                )
+            self.stdout.write(self.style.SUCCESS(
+                'No regressions against the baseline.'
+            ))
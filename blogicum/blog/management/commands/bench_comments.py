@@ -0,0 +1,52 @@
+import json
+from pathlib import Path
+
+from django.core.management.base import BaseCommand, CommandError
+
+from blog import benchmarks
+
+
+class Command(BaseCommand):
+    help = (
+        'Measure sustained comments per second with a transaction per '
+        'comment and with the batching comment writer'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--duration', type=float, default=5.0,
+            help='Seconds each mode runs.',
+        )
+        parser.add_argument(
+            '--clients', type=int, default=16,
+            help='Threads posting comments at once.',
+        )
+        parser.add_argument(
+            '--modes', nargs='+', choices=benchmarks.COMMENT_MODES,
+            default=list(benchmarks.COMMENT_MODES),
+            help='direct: a transaction per comment, queued: the writer.',
+        )
+        parser.add_argument(
+            '--output', type=Path,
+            help='Write the results as JSON to this file.',
+        )
+
+    def handle(self, *args, **options):
+        results = benchmarks.comment_throughput(
+            duration=options['duration'],
+            clients=options['clients'],
+            modes=options['modes'],
+        )
+        if not results:
+            raise CommandError('No visible post to comment on.')
+        self.stdout.write(
+            f'{"mode":<10}{"comments/s":>12}{"p95 ms":>10}{"locked":>8}'
+            f'{"per batch":>11}'
+        )
+        for mode, row in results.items():
+            self.stdout.write(
+                f'{mode:<10}{row["per_second"]:>12}{row["p95_ms"]!s:>10}'
+                f'{row["locked"]:>8}{row.get("per_batch", "-")!s:>11}'
+            )
+        if options['output']:
+            options['output'].write_text(json.dumps(results, indent=2))
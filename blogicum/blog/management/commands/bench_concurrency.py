@@ -0,0 +1,58 @@
+import json
+from pathlib import Path
+
+from django.core.management.base import BaseCommand, CommandError
+
+from blog import benchmarks
+
+
+class Command(BaseCommand):
+    help = (
+        'Compare the throughput of the read-only blog pages under the WSGI '
+        'and ASGI handlers at high concurrency'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--requests', type=int, default=500,
+            help='Timed requests per server mode.',
+        )
+        parser.add_argument(
+            '--concurrency', type=int, default=64,
+            help='Requests in flight at a time.',
+        )
+        parser.add_argument(
+            '--modes', nargs='+', choices=list(benchmarks.SERVER_MODES),
+            default=list(benchmarks.SERVER_MODES),
+            help='wsgi: sync views under WSGI, asgi-sync: sync views under '
+                 'ASGI, asgi: async views under ASGI.',
+        )
+        parser.add_argument(
+            '--cold-cache', action='store_true',
+            help='Keep pages out of the page cache.',
+        )
+        parser.add_argument(
+            '--output', type=Path,
+            help='Write the results as JSON to this file.',
+        )
+
+    def handle(self, *args, **options):
+        results = benchmarks.throughput(
+            requests=options['requests'],
+            concurrency=options['concurrency'],
+            modes=options['modes'],
+            cold_cache=options['cold_cache'],
+        )
+        if not results:
+            raise CommandError('No visible post to build the page URLs.')
+        self.stdout.write(
+            f'{"mode":<12}{"req/s":>10}{"p50 ms":>10}{"p95 ms":>10}'
+            f'{"p99 ms":>10}{"errors":>8}'
+        )
+        for mode, row in results.items():
+            self.stdout.write(
+                f'{mode:<12}{row["rps"]:>10}{row["p50_ms"]:>10}'
+                f'{row["p95_ms"]:>10}{row["p99_ms"]:>10}{row["errors"]:>8}'
+            )
+        if options['output']:
+            options['output'].write_text(json.dumps(results, indent=2))
@@ -0,0 +1,61 @@
+import json
+from pathlib import Path
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+
+from blog import benchmarks
+
+
+class Command(BaseCommand):
+    help = (
+        'Measure concurrent reads and comment writes on a copy of the '
+        'SQLite database before and after the tuned connection profile'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--duration', type=float, default=5.0,
+            help='Seconds each profile runs.',
+        )
+        parser.add_argument(
+            '--readers', type=int, default=8,
+            help='Threads loading the feed and a comment page.',
+        )
+        parser.add_argument(
+            '--writers', type=int, default=4,
+            help='Threads posting comments.',
+        )
+        parser.add_argument(
+            '--database', default='default',
+            help='Database alias to copy.',
+        )
+        parser.add_argument(
+            '--output', type=Path,
+            help='Write the results as JSON to this file.',
+        )
+
+    def handle(self, *args, **options):
+        if connections[options['database']].vendor != 'sqlite':
+            raise CommandError('The database is not SQLite.')
+        results = benchmarks.sqlite_throughput(
+            duration=options['duration'],
+            readers=options['readers'],
+            writers=options['writers'],
+            using=options['database'],
+        )
+        if not results:
+            raise CommandError('No visible post to comment on.')
+        self.stdout.write(
+            f'{"profile":<10}{"reads/s":>10}{"read p95":>10}'
+            f'{"writes/s":>10}{"write p95":>11}{"locked":>8}'
+        )
+        for name, row in results.items():
+            reads, writes = row['reads'], row['writes']
+            self.stdout.write(
+                f'{name:<10}{reads["per_second"]:>10}{reads["p95_ms"]!s:>10}'
+                f'{writes["per_second"]:>10}{writes["p95_ms"]!s:>11}'
+                f'{reads["locked"] + writes["locked"]:>8}'
+            )
+        if options['output']:
+            options['output'].write_text(json.dumps(results, indent=2))
@@ -0,0 +1,77 @@
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+from django.core.management.base import BaseCommand
+
+from blog.images import (
+    delete_variants,
+    init_worker,
+    missing_variants,
+    process_upload
+)
+from blog.models import Post
+from blog.signals import refresh_bulk_posts
+
+DEFAULT_BATCH_SIZE = 200
+
+
+def _process(job):
+    """Stripped original and variants of one image, run in a worker
+    process"""
+    pk, name, stale = job
+    delete_variants(stale)
+    return pk, process_upload(name)
+
+
+class Command(BaseCommand):
+    help = 'Generate resized variants of existing post images'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--workers',
+            type=int,
+            default=os.cpu_count(),
+            help='Worker processes resizing images.',
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=DEFAULT_BATCH_SIZE,
+            help='Posts read and updated per batch.',
+        )
+        parser.add_argument(
+            '--force',
+            action='store_true',
+            help='Regenerate variants that already exist.',
+        )
+
+    def handle(self, *args, **options):
+        posts = Post.objects.exclude(image='')
+        if not options['force']:
+            posts = posts.filter(missing_variants())
+        last_pk = 0
+        processed = failed = 0
+        with ProcessPoolExecutor(
+            max_workers=options['workers'], initializer=init_worker
+        ) as pool:
+            while True:
+                batch = list(
+                    posts.filter(pk__gt=last_pk).order_by('pk').values_list(
+                        'pk', 'image', 'image_variants'
+                    )[:options['batch_size']]
+                )
+                if not batch:
+                    break
+                last_pk = batch[-1][0]
+                updated = [
+                    Post(pk=pk, image_variants=variants)
+                    for pk, variants in pool.map(_process, batch)
+                ]
+                Post.objects.bulk_update(updated, ['image_variants'])
+                # bulk_update skips the signals that refresh cached cards.
+                refresh_bulk_posts([post.pk for post in updated])
+                processed += len(updated)
+                failed += sum(not post.image_variants for post in updated)
+        self.stdout.write(self.style.SUCCESS(
+            f'Processed {processed} images, {failed} unreadable.'
+        ))
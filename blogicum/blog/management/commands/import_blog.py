@@ -0,0 +1,224 @@
+import gzip
+import json
+import re
+import time
+from collections import Counter, defaultdict
+from pathlib import Path
+
+from django.contrib.auth import get_user_model
+from django.core.exceptions import FieldDoesNotExist
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+from django.core.management.color import no_style
+from django.core.serializers.base import DeserializationError
+from django.core.serializers.python import Deserializer
+from django.db import connection, transaction
+from django.utils import timezone
+
+from blog.models import Category, Comment, Location, Post
+from blog.signals import refresh_bulk_posts
+
+READ_CHUNK = 64 * 1024
+# Characters that end a JSON token, so that a decode error followed by
+# one of them cannot be fixed by reading further.
+TOKEN_END = re.compile(r'[\s{}\[\]:,"]')
+DEFAULT_BATCH_SIZE = 2_000
+
+
+def open_fixture(path):
+    """Text stream of a fixture, gzip compressed or not"""
+    if path.suffix == '.gz':
+        return gzip.open(path, 'rt', encoding='utf-8')
+    return open(path, encoding='utf-8')
+
+
+def iter_jsonl(stream):
+    """Objects of a JSON Lines stream, one per non-empty line"""
+    for line in stream:
+        line = line.strip()
+        if line:
+            yield json.loads(line)
+
+
+def _needs_more(error, buffer):
+    """Whether a decode error may only mean that the buffer ends within
+    the object: in a string or in the token at the error position"""
+    if error.msg.startswith('Unterminated string'):
+        return True
+    return TOKEN_END.search(buffer, error.pos) is None
+
+
+def iter_json_array(stream):
+    """Objects of a top-level JSON array, decoded one at a time"""
+    decoder = json.JSONDecoder()
+    buffer = ''
+    # Characters of the stream read before the buffer.
+    offset = 0
+    position = 0
+    started = False
+    eof = False
+    while True:
+        while position < len(buffer) and buffer[position] in ' \t\r\n,':
+            position += 1
+        if not started and position < len(buffer):
+            if buffer[position] != '[':
+                raise CommandError('A JSON fixture must be an array.')
+            started = True
+            position += 1
+            continue
+        if started and position < len(buffer) and buffer[position] == ']':
+            return
+        try:
+            obj, end = decoder.raw_decode(buffer, position)
+        except json.JSONDecodeError as error:
+            if not _needs_more(error, buffer):
+                raise CommandError(
+                    f'Invalid JSON at character {offset + error.pos}: '
+                    f'{error.msg}.'
+                )
+            if eof:
+                raise CommandError('The JSON fixture is truncated.')
+            chunk = stream.read(READ_CHUNK)
+            eof = not chunk
+            offset += position
+            buffer = buffer[position:] + chunk
+            position = 0
+            continue
+        yield obj
+        position = end
+
+
+class Command(BaseCommand):
+    help = (
+        'Stream blog fixtures (JSON array or JSON Lines, optionally '
+        'gzipped) into the database in batched transactions'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('fixtures', nargs='+', type=Path)
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=DEFAULT_BATCH_SIZE,
+            help='Objects inserted per transaction.',
+        )
+        parser.add_argument(
+            '--format',
+            choices=('auto', 'json', 'jsonl'),
+            default='auto',
+            help='Fixture format; auto picks jsonl for .jsonl files.',
+        )
+
+    def handle(self, *args, **options):
+        self.batch_size = options['batch_size']
+        self.models = {
+            model._meta.label_lower: model
+            for model in (get_user_model(), Category, Location, Post, Comment)
+        }
+        self.now = timezone.now()
+        self.loaded = Counter()
+        self.skipped = Counter()
+        started = time.monotonic()
+
+        with connection.constraint_checks_disabled():
+            for path in options['fixtures']:
+                self.load(path, options['format'])
+        # Rows went in with foreign key checks off, so they are verified
+        # at once here, like loaddata does.
+        connection.check_constraints(table_names=[
+            model._meta.db_table
+            for label, model in self.models.items() if self.loaded[label]
+        ])
+        self.reset_sequences()
+        if self.loaded['blog.post'] or self.loaded['blog.comment']:
+            call_command('recount_comments', stdout=self.stdout)
+
+        elapsed = time.monotonic() - started
+        total = sum(self.loaded.values())
+        for label, count in sorted(self.loaded.items()):
+            self.stdout.write(f'{label}: {count}')
+        for label, count in sorted(self.skipped.items()):
+            self.stdout.write(self.style.WARNING(
+                f'{label}: {count} skipped, not a blog model'
+            ))
+        self.stdout.write(self.style.SUCCESS(
+            f'Loaded {total} objects in {elapsed:.1f}s '
+            f'({total / max(elapsed, 1e-9):.0f} objects/s).'
+        ))
+
+    def load(self, path, fixture_format):
+        if fixture_format == 'auto':
+            jsonl = '.jsonl' in path.suffixes
+        else:
+            jsonl = fixture_format == 'jsonl'
+        with open_fixture(path) as stream:
+            records = iter_jsonl(stream) if jsonl else iter_json_array(stream)
+            pending = []
+            try:
+                for obj in Deserializer(self.blog_records(records)):
+                    pending.append(obj)
+                    if len(pending) >= self.batch_size:
+                        self.insert(pending)
+                        pending = []
+            except (DeserializationError, FieldDoesNotExist) as error:
+                raise CommandError(f'{path}: {error}')
+            self.insert(pending)
+
+    def blog_records(self, records):
+        for record in records:
+            label = record.get('model', '').lower()
+            if label in self.models:
+                yield record
+            else:
+                self.skipped[label] += 1
+
+    @transaction.atomic
+    def insert(self, deserialized):
+        """One transaction of raw inserts, grouped by model.
+
+        Raw mode, as used by loaddata, keeps the created_at values of the
+        fixture that bulk_create would replace through auto_now_add.
+        """
+        by_model = defaultdict(list)
+        m2m_rows = defaultdict(list)
+        for item in deserialized:
+            obj = item.object
+            if isinstance(obj, Post):
+                obj.is_visible = obj.is_published and obj.pub_date <= self.now
+            by_model[type(obj)].append(obj)
+            for name, ids in (item.m2m_data or {}).items():
+                field = type(obj)._meta.get_field(name)
+                through = field.remote_field.through
+                m2m_rows[through].extend(
+                    through(**{
+                        f'{field.m2m_field_name()}_id': obj.pk,
+                        f'{field.m2m_reverse_field_name()}_id': target,
+                    })
+                    for target in ids
+                )
+        for model, objects in by_model.items():
+            fields = model._meta.concrete_fields
+            step = connection.ops.bulk_batch_size(fields, objects)
+            for start in range(0, len(objects), step):
+                model._base_manager._insert(
+                    objects[start:start + step], fields=fields, raw=True
+                )
+            self.loaded[model._meta.label_lower] += len(objects)
+        for through, rows in m2m_rows.items():
+            through.objects.bulk_create(rows, batch_size=self.batch_size)
+        # Raw inserts bypass the model signals that keep caches fresh;
+        # counters of commented posts are refreshed by recount_comments.
+        refresh_bulk_posts(
+            [obj.pk for obj in by_model.get(Post, ())], new=True
+        )
+
+    def reset_sequences(self):
+        models = [
+            model for label, model in self.models.items()
+            if self.loaded[label]
+        ]
+        statements = connection.ops.sequence_reset_sql(no_style(), models)
+        if statements:
+            with connection.cursor() as cursor:
+                for sql in statements:
+                    cursor.execute(sql)
@@ -0,0 +1,70 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from blog.models import Post
+
+DEFAULT_INTERVAL = 30
+DEFAULT_BATCH_SIZE = 100
+
+
+class Command(BaseCommand):
+    help = 'Make scheduled posts visible once their publication time arrives'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--loop',
+            action='store_true',
+            help='Keep running and publish posts as they become due.',
+        )
+        parser.add_argument(
+            '--interval',
+            type=float,
+            default=DEFAULT_INTERVAL,
+            help='Longest pause between checks in loop mode, in seconds.',
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=DEFAULT_BATCH_SIZE,
+            help='Number of posts fetched per query.',
+        )
+
+    def handle(self, *args, **options):
+        while True:
+            published = self.publish_due(options['batch_size'])
+            if published:
+                self.stdout.write(self.style.SUCCESS(
+                    f'Published {published} scheduled posts.'
+                ))
+            if not options['loop']:
+                break
+            time.sleep(self.pause(options['interval']))
+
+    def publish_due(self, batch_size):
+        """Flipping due posts one by one through save(), so that the
+        cache invalidation of a regular edit runs for each of them"""
+        scheduled = Post.objects.filter(is_published=True, is_visible=False)
+        published = 0
+        while True:
+            posts = list(
+                scheduled.filter(pub_date__lte=timezone.now()).order_by(
+                    'pub_date', 'pk'
+                )[:batch_size]
+            )
+            if not posts:
+                return published
+            for post in posts:
+                post.save(update_fields=['is_visible'])
+            published += len(posts)
+
+    def pause(self, interval):
+        """Sleeping until the next scheduled post, at most `interval`"""
+        next_date = Post.objects.filter(
+            is_published=True, is_visible=False
+        ).order_by('pub_date').values_list('pub_date', flat=True).first()
+        if next_date is None:
+            return interval
+        due_in = (next_date - timezone.now()).total_seconds()
+        return min(interval, max(due_in, 0))
@@ -0,0 +1,15 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from blog.search import has_index, rebuild_index
+
+
+class Command(BaseCommand):
+    help = 'Rebuild the full-text index of post titles and texts'
+
+    def handle(self, *args, **options):
+        if not has_index():
+            raise CommandError(
+                'The full-text index is only available on SQLite.'
+            )
+        rebuild_index()
+        self.stdout.write(self.style.SUCCESS('Search index rebuilt.'))
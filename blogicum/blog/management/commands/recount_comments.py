@@ -0,0 +1,61 @@
+from django.core.management.base import BaseCommand
+from django.db.models import Count, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+from blog.models import Comment, Post
+from blog.signals import refresh_bulk_posts
+
+DEFAULT_BATCH_SIZE = 1000
+
+
+class Command(BaseCommand):
+    help = 'Recompute drifted Post.comment_count counters in batches'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=DEFAULT_BATCH_SIZE,
+            help='Number of posts checked per batch.',
+        )
+
+    def handle(self, *args, **options):
+        batch_size = options['batch_size']
+        actual_count = Coalesce(
+            Subquery(
+                Comment.objects.filter(post=OuterRef('pk')).order_by().values(
+                    'post'
+                ).annotate(total=Count('pk')).values('total')
+            ),
+            0,
+        )
+        last_pk = 0
+        checked = fixed = 0
+        while True:
+            batch = list(
+                Post.objects.filter(pk__gt=last_pk).order_by('pk').values_list(
+                    'pk', 'comment_count'
+                )[:batch_size]
+            )
+            if not batch:
+                break
+            first_pk, last_pk = batch[0][0], batch[-1][0]
+            counts = dict(
+                Comment.objects.filter(
+                    post_id__gte=first_pk, post_id__lte=last_pk
+                ).order_by().values_list('post').annotate(total=Count('pk'))
+            )
+            drifted = [
+                pk for pk, stored in batch if stored != counts.get(pk, 0)
+            ]
+            if drifted:
+                # Recounted in the UPDATE itself, so comments added since
+                # the check above are not lost.
+                fixed += Post.objects.filter(pk__in=drifted).update(
+                    comment_count=actual_count
+                )
+                refresh_bulk_posts(drifted)
+            checked += len(batch)
+        self.stdout.write(self.style.SUCCESS(
+            f'Checked {checked} posts, fixed {fixed} counters.'
+        ))
@@ -0,0 +1,181 @@
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import F, Q
+from django.utils import timezone
+
+from blog.images import delete_variants, init_worker, process_upload
+from blog.models import ImageJob, Post
+
+DEFAULT_INTERVAL = 5
+DEFAULT_BATCH_SIZE = 20
+DEFAULT_MAX_ATTEMPTS = 3
+DEFAULT_RETRY_AFTER = 60
+DEFAULT_STALE_AFTER = 10 * 60
+
+
+def _process(job):
+    """(job pk, variants, error) of one queued image, run in a worker
+    process; the error is None on success"""
+    pk, name = job
+    try:
+        return pk, process_upload(name), None
+    except Exception as error:
+        # e.g. DecompressionBombError, which is not an OSError
+        return pk, {}, f'{type(error).__name__}: {error}'
+
+
+class Command(BaseCommand):
+    help = 'Resize queued post images in a pool of worker processes'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--loop',
+            action='store_true',
+            help='Keep running and process images as they are queued.',
+        )
+        parser.add_argument(
+            '--interval',
+            type=float,
+            default=DEFAULT_INTERVAL,
+            help='Pause between checks of an empty queue, in seconds.',
+        )
+        parser.add_argument(
+            '--workers',
+            type=int,
+            default=os.cpu_count(),
+            help='Worker processes resizing images.',
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=DEFAULT_BATCH_SIZE,
+            help='Jobs claimed at a time.',
+        )
+        parser.add_argument(
+            '--max-attempts',
+            type=int,
+            default=DEFAULT_MAX_ATTEMPTS,
+            help='Attempts before a job is left as failed.',
+        )
+        parser.add_argument(
+            '--retry-after',
+            type=float,
+            default=DEFAULT_RETRY_AFTER,
+            help='Seconds before a failed job is attempted again.',
+        )
+        parser.add_argument(
+            '--stale-after',
+            type=float,
+            default=DEFAULT_STALE_AFTER,
+            help='Seconds after which a running job of a crashed worker '
+                 'is claimed again.',
+        )
+
+    def handle(self, *args, **options):
+        self.max_attempts = options['max_attempts']
+        self.retry_after = timedelta(seconds=options['retry_after'])
+        self.stale_after = timedelta(seconds=options['stale_after'])
+        with ProcessPoolExecutor(
+            max_workers=options['workers'], initializer=init_worker
+        ) as pool:
+            while True:
+                done = self.run_queue(pool, options['batch_size'])
+                if done:
+                    self.stdout.write(self.style.SUCCESS(
+                        f'Processed {done} images.'
+                    ))
+                if not options['loop']:
+                    break
+                time.sleep(options['interval'])
+
+    def run_queue(self, pool, batch_size):
+        """Processing claimed batches until the queue is empty"""
+        done = 0
+        while True:
+            jobs = self.claim(batch_size)
+            if not jobs:
+                return done
+            results = {
+                pk: (variants, error) for pk, variants, error in pool.map(
+                    _process, [(job.pk, job.image) for job in jobs]
+                )
+            }
+            for job in jobs:
+                done += self.finish(job, *results[job.pk])
+
+    def claim(self, batch_size):
+        """Pending jobs, and running ones left by a crashed worker, taken
+        one by one so that concurrent workers never share a job.
+
+        locked_at keeps the time of the last attempt, which holds a failed
+        job back for the retry delay.
+        """
+        now = timezone.now()
+        claimable = Q(
+            status=ImageJob.PENDING, locked_at__isnull=True
+        ) | Q(
+            status=ImageJob.PENDING, locked_at__lte=now - self.retry_after
+        ) | Q(
+            status=ImageJob.RUNNING,
+            locked_at__lt=now - self.stale_after,
+            attempts__lt=self.max_attempts,
+        )
+        # Jobs that crashed their worker on the last attempt.
+        ImageJob.objects.filter(
+            status=ImageJob.RUNNING,
+            locked_at__lt=now - self.stale_after,
+            attempts__gte=self.max_attempts,
+        ).update(
+            status=ImageJob.FAILED,
+            error='The worker stopped while processing the image.',
+        )
+        claimed = [
+            pk for pk in ImageJob.objects.filter(claimable).order_by(
+                'created_at', 'pk'
+            ).values_list('pk', flat=True)[:batch_size]
+            if ImageJob.objects.filter(claimable, pk=pk).update(
+                status=ImageJob.RUNNING,
+                locked_at=now,
+                attempts=F('attempts') + 1,
+            )
+        ]
+        return list(ImageJob.objects.filter(pk__in=claimed).order_by(
+            'created_at', 'pk'
+        ))
+
+    @transaction.atomic
+    def finish(self, job, variants, error=None):
+        """Storing the variants on the post, through save() so that its
+        cached cards and pages are dropped"""
+        if not variants:
+            job.status = (
+                ImageJob.FAILED if job.attempts >= self.max_attempts
+                else ImageJob.PENDING
+            )
+            job.error = (
+                error or 'Cannot read the image, see the blog.images log.'
+            )
+            job.save(update_fields=['status', 'error'])
+            return 0
+        post = Post.objects.select_for_update().filter(
+            pk=job.post_id, image=job.image
+        ).first()
+        if post is None:
+            # The image was replaced or the post deleted meanwhile.
+            transaction.on_commit(lambda: delete_variants(variants))
+        else:
+            # e.g. an admin thumbnail generated on demand in the meantime
+            stale = {
+                key: variant for key, variant in post.image_variants.items()
+                if variant['name'] != variants.get(key, {}).get('name')
+            }
+            transaction.on_commit(lambda: delete_variants(stale))
+            post.image_variants = variants
+            post.save(update_fields=['image_variants'])
+        job.delete()
+        return 1
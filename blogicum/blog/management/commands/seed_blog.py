@@ -0,0 +1,287 @@
+import argparse
+import itertools
+import random
+import time
+from datetime import timedelta
+
+from django.contrib.auth.hashers import make_password
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.db.models import Max
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from blog.models import Category, Comment, Location, Post, User
+from blog.signals import refresh_bulk_posts
+
+WORDS = (
+    'блог путешествие город море горы утро вечер дорога книга кофе '
+    'друзья музыка поезд лес река фото история день ночь солнце дождь '
+    'снег осень весна лето зима рынок парк мост улица небо ветер'
+).split()
+PASSWORD = 'seed-password'
+PASSWORD_SALT = 'seedblog'
+TEXT_POOL_SIZE = 2_000
+DATE_SPREAD_DAYS = 5 * 365
+POST_FIELDS = (
+    'id', 'title', 'text', 'image', 'pub_date', 'created_at', 'author',
+    'category', 'location', 'is_published', 'is_visible', 'comment_count',
+    'image_variants',
+)
+COMMENT_FIELDS = ('id', 'post', 'author', 'comment', 'created_at')
+FUTURE_SPREAD_DAYS = 60
+# Dates are spread around a fixed moment rather than the clock, so that
+# the same seed and volumes give the same rows on any day.
+DEFAULT_NOW = '2025-01-01T00:00:00+00:00'
+
+
+def aware_datetime(value):
+    """Aware datetime of an ISO 8601 option, UTC when no offset is given"""
+    moment = parse_datetime(value)
+    if moment is None:
+        raise argparse.ArgumentTypeError(f'Not an ISO 8601 datetime: {value}')
+    if timezone.is_naive(moment):
+        moment = timezone.make_aware(moment, timezone.utc)
+    return moment
+
+
+def zipf_cum_weights(size, skew):
+    """Cumulative weights making the first items the most popular"""
+    return list(itertools.accumulate(
+        1 / (rank ** skew) for rank in range(1, size + 1)
+    ))
+
+
+class Command(BaseCommand):
+    help = (
+        'Fill the database with a large deterministic synthetic blog; '
+        'same seed, volumes and --now give the same rows'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=10_000)
+        parser.add_argument('--categories', type=int, default=50)
+        parser.add_argument('--locations', type=int, default=200)
+        parser.add_argument('--posts', type=int, default=1_000_000)
+        parser.add_argument('--comments', type=int, default=10_000_000)
+        parser.add_argument(
+            '--seed', type=int, default=1,
+            help='Same seed and volumes give the same data.',
+        )
+        parser.add_argument(
+            '--now', type=aware_datetime, default=DEFAULT_NOW,
+            help=(
+                'Moment the dates are spread around, ISO 8601; '
+                '--future-ratio of the posts are dated after it.'
+            ),
+        )
+        parser.add_argument('--batch-size', type=int, default=5_000)
+        parser.add_argument(
+            '--skew', type=float, default=1.1,
+            help='Zipf exponent of author, category and comment skew.',
+        )
+        parser.add_argument('--future-ratio', type=float, default=0.02)
+        parser.add_argument('--unpublished-ratio', type=float, default=0.05)
+        parser.add_argument(
+            '--unpublished-categories-ratio', type=float, default=0.1
+        )
+
+    def handle(self, *args, **options):
+        self.rng = random.Random(options['seed'])
+        self.batch_size = options['batch_size']
+        self.now = options['now']
+        # Scheduled posts already due are shown at once, as
+        # publish_scheduled would.
+        self.visible_until = timezone.now()
+        self.texts = {
+            words: [self.text(words) for _ in range(TEXT_POOL_SIZE)]
+            for words in (4, 12, 40, 80)
+        }
+        started = time.monotonic()
+
+        users = self.create_users(options['users'])
+        categories = self.create_categories(
+            options['categories'], options['unpublished_categories_ratio']
+        )
+        locations = self.create_locations(options['locations'])
+        posts, comments = self.create_posts_and_comments(
+            options, users, categories, locations
+        )
+
+        elapsed = time.monotonic() - started
+        self.stdout.write(self.style.SUCCESS(
+            f'Created {len(users)} users, {len(categories)} categories, '
+            f'{len(locations)} locations, {posts} posts and {comments} '
+            f'comments in {elapsed:.1f}s.'
+        ))
+
+    def text(self, words):
+        return ' '.join(self.rng.choices(WORDS, k=words))
+
+    def first_id(self, model):
+        return (model.objects.aggregate(last=Max('pk'))['last'] or 0) + 1
+
+    def pooled_text(self, words):
+        return self.rng.choice(self.texts[words])
+
+    def bulk_create(self, model, objects):
+        with transaction.atomic():
+            model.objects.bulk_create(objects, batch_size=self.batch_size)
+
+    def insert_rows(self, model, fields, rows):
+        """Plain executemany INSERT for posts and comments.
+
+        bulk_create compiles every row into SQL through the fields, which
+        costs more than the insert itself at millions of rows; values
+        here are already adapted for the database.
+        """
+        meta = model._meta
+        columns = ', '.join(
+            connection.ops.quote_name(meta.get_field(name).column)
+            for name in fields
+        )
+        placeholders = ', '.join(['%s'] * len(fields))
+        sql = (
+            f'INSERT INTO {connection.ops.quote_name(meta.db_table)} '
+            f'({columns}) VALUES ({placeholders})'
+        )
+        with transaction.atomic(), connection.cursor() as cursor:
+            cursor.executemany(sql, rows)
+
+    def adapt_date(self, value):
+        return connection.ops.adapt_datetimefield_value(value)
+
+    def create_users(self, count):
+        first = self.first_id(User)
+        password = make_password(PASSWORD, PASSWORD_SALT)
+        ids = range(first, first + count)
+        for chunk in self.chunks(ids):
+            self.bulk_create(User, [
+                User(
+                    pk=pk,
+                    username=f'seed_{pk}',
+                    first_name=self.text(1).title(),
+                    password=password,
+                    date_joined=self.now - timedelta(
+                        days=self.rng.uniform(0, DATE_SPREAD_DAYS)
+                    ),
+                )
+                for pk in chunk
+            ])
+        return list(ids)
+
+    def create_categories(self, count, unpublished_ratio):
+        first = self.first_id(Category)
+        ids = list(range(first, first + count))
+        self.bulk_create(Category, [
+            Category(
+                pk=pk,
+                title=self.text(2).title(),
+                description=self.text(12),
+                slug=f'seed-{pk}',
+                is_published=self.rng.random() >= unpublished_ratio,
+            )
+            for pk in ids
+        ])
+        return ids
+
+    def create_locations(self, count):
+        first = self.first_id(Location)
+        ids = list(range(first, first + count))
+        self.bulk_create(Location, [
+            Location(pk=pk, name=self.text(2).title()) for pk in ids
+        ])
+        return ids
+
+    def create_posts_and_comments(self, options, users, categories,
+                                  locations):
+        """Posts with their comments, batch by batch, so that counters
+        and visibility are stored right without a second pass"""
+        skew = options['skew']
+        author_weights = zipf_cum_weights(len(users), skew)
+        category_weights = zipf_cum_weights(len(categories), skew)
+        commenter_weights = zipf_cum_weights(len(users), skew)
+        mean_comments = options['comments'] / max(options['posts'], 1)
+        # Pareto weights with the same shape as the Zipf skew, scaled so
+        # that their mean stays at mean_comments.
+        alpha = 1 + 1 / skew
+        pareto_mean = alpha / (alpha - 1)
+
+        first_post = self.first_id(Post)
+        next_comment = self.first_id(Comment)
+        post_ids = range(first_post, first_post + options['posts'])
+        total_comments = 0
+        for chunk in self.chunks(post_ids):
+            authors = self.rng.choices(
+                users, cum_weights=author_weights, k=len(chunk)
+            )
+            post_categories = self.rng.choices(
+                categories, cum_weights=category_weights, k=len(chunk)
+            )
+            posts = []
+            comments = []
+            for pk, author, category in zip(chunk, authors, post_categories):
+                if self.rng.random() < options['future_ratio']:
+                    pub_date = self.now + timedelta(
+                        days=self.rng.uniform(0, FUTURE_SPREAD_DAYS)
+                    )
+                    created_at = self.now
+                else:
+                    pub_date = self.now - timedelta(
+                        days=self.rng.uniform(0, DATE_SPREAD_DAYS)
+                    )
+                    created_at = pub_date
+                is_published = (
+                    self.rng.random() >= options['unpublished_ratio']
+                )
+                comment_count = round(
+                    mean_comments * self.rng.paretovariate(alpha)
+                    / pareto_mean
+                )
+                location = None
+                if locations and self.rng.random() < 0.7:
+                    location = self.rng.choice(locations)
+                posts.append((
+                    pk,
+                    self.pooled_text(4).capitalize(),
+                    self.pooled_text(self.rng.choice((40, 80))),
+                    '',
+                    self.adapt_date(pub_date),
+                    self.adapt_date(created_at),
+                    author,
+                    category,
+                    location,
+                    is_published,
+                    is_published and pub_date <= self.visible_until,
+                    comment_count,
+                    '{}',
+                ))
+                commented_at = max(created_at, pub_date)
+                for commenter in self.rng.choices(
+                    users, cum_weights=commenter_weights, k=comment_count
+                ):
+                    commented_at += timedelta(
+                        minutes=self.rng.expovariate(1 / 90)
+                    )
+                    comments.append((
+                        next_comment,
+                        pk,
+                        commenter,
+                        self.pooled_text(self.rng.choice((4, 12))),
+                        self.adapt_date(commented_at),
+                    ))
+                    next_comment += 1
+            self.insert_rows(Post, POST_FIELDS, posts)
+            self.insert_rows(Comment, COMMENT_FIELDS, comments)
+            # Bulk inserts bypass the model signals that keep caches fresh.
+            refresh_bulk_posts(chunk, new=True)
+            total_comments += len(comments)
+            self.stdout.write(
+                f'{chunk[-1] - first_post + 1} posts, '
+                f'{total_comments} comments'
+            )
+        return len(post_ids), total_comments
+
+    def chunks(self, ids):
+        for start in range(0, len(ids), self.batch_size):
+            yield ids[start:start + self.batch_size]
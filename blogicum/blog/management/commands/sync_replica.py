@@ -0,0 +1,34 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from blog.replica import sync_replica
+
+DEFAULT_INTERVAL = 30
+
+
+class Command(BaseCommand):
+    help = 'Copy the default database over the read replica'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--loop',
+            action='store_true',
+            help='Keep copying every --interval seconds.',
+        )
+        parser.add_argument(
+            '--interval',
+            type=float,
+            default=DEFAULT_INTERVAL,
+            help='Pause between copies, in seconds.',
+        )
+
+    def handle(self, *args, **options):
+        while True:
+            started_at = sync_replica()
+            self.stdout.write('Replica synced as of {}.'.format(
+                time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(started_at))
+            ))
+            if not options['loop']:
+                return
+            time.sleep(options['interval'])
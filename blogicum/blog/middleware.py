@@ -0,0 +1,177 @@
+import asyncio
+import json
+import logging
+import time
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.db import connections
+from django.db.backends.signals import connection_created
+from django.dispatch import receiver
+
+from blog.replica import PIN_COOKIE
+
+logger = logging.getLogger('blog.queries')
+SAFE_METHODS = ('GET', 'HEAD', 'OPTIONS', 'TRACE')
+
+# Recorder of the request being served. Context variables follow the
+# request into the threads of sync_to_async, so queries that async views
+# run in a thread pool are counted for the right request.
+active_recorder = ContextVar('blog_query_recorder', default=None)
+
+
+class QueryBudgetExceeded(Exception):
+    """A view ran more SQL queries than its configured budget"""
+
+
+class QueryRecorder:
+    """execute_wrapper collecting count, total and slowest SQL time"""
+
+    def __init__(self):
+        self.count = 0
+        self.total = 0.0
+        self.slowest = 0.0
+        self.slowest_sql = ''
+
+    def __call__(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            duration = time.perf_counter() - start
+            self.count += 1
+            self.total += duration
+            if duration >= self.slowest:
+                self.slowest = duration
+                self.slowest_sql = sql
+
+
+def record_query(execute, sql, params, many, context):
+    """execute_wrapper handing each query to the active recorder"""
+    recorder = active_recorder.get()
+    if recorder is None:
+        return execute(sql, params, many, context)
+    return recorder(execute, sql, params, many, context)
+
+
+def install_query_recording(connection):
+    if record_query not in connection.execute_wrappers:
+        connection.execute_wrappers.append(record_query)
+
+
+@receiver(connection_created)
+def record_new_connection(sender, connection, **kwargs):
+    """Recording the queries of connections opened in any thread"""
+    install_query_recording(connection)
+
+
+class QueryInstrumentationMiddleware:
+    """Per-request SQL statistics with optional query budgets.
+
+    Every query on every configured database is timed. The totals go to
+    the Server-Timing header and to one JSON line on the `blog.queries`
+    logger, and requests to URL names listed in BLOG_QUERY_BUDGETS are
+    checked against their budget.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if asyncio.iscoroutinefunction(get_response):
+            # Served as a coroutine under ASGI, like MiddlewareMixin.
+            self._is_coroutine = asyncio.coroutines._is_coroutine
+
+    def __call__(self, request):
+        if asyncio.iscoroutinefunction(self.get_response):
+            return self.__acall__(request)
+        for alias in connections:
+            install_query_recording(connections[alias])
+        recorder = QueryRecorder()
+        token = active_recorder.set(recorder)
+        start = time.perf_counter()
+        try:
+            response = self.get_response(request)
+        finally:
+            active_recorder.reset(token)
+        return self.report(request, response, recorder, start)
+
+    async def __acall__(self, request):
+        recorder = QueryRecorder()
+        token = active_recorder.set(recorder)
+        start = time.perf_counter()
+        try:
+            response = await self.get_response(request)
+        finally:
+            active_recorder.reset(token)
+        return self.report(request, response, recorder, start)
+
+    def report(self, request, response, recorder, start):
+        """Server-Timing header, log line and budget check of a request"""
+        elapsed = time.perf_counter() - start
+        view_name = getattr(request.resolver_match, 'view_name', None)
+        response['Server-Timing'] = ', '.join((
+            f'db;dur={recorder.total * 1000:.2f};'
+            f'desc="{recorder.count} queries"',
+            f'db-slowest;dur={recorder.slowest * 1000:.2f}',
+            f'app;dur={elapsed * 1000:.2f}',
+        ))
+        logger.info(json.dumps({
+            'method': request.method,
+            'path': request.path,
+            'view': view_name,
+            'status': response.status_code,
+            'queries': recorder.count,
+            'db_ms': round(recorder.total * 1000, 2),
+            'slowest_ms': round(recorder.slowest * 1000, 2),
+            'slowest_sql': recorder.slowest_sql[:200],
+            'total_ms': round(elapsed * 1000, 2),
+        }, ensure_ascii=False))
+        self.check_budget(view_name, recorder.count)
+        return response
+
+    def check_budget(self, view_name, count):
+        """Logging or raising when a view goes over its query budget"""
+        budget = settings.BLOG_QUERY_BUDGETS.get(view_name)
+        if budget is None or count <= budget:
+            return
+        message = (
+            f'{view_name} ran {count} queries, budget is {budget}'
+        )
+        if settings.BLOG_QUERY_BUDGET_ACTION == 'raise':
+            raise QueryBudgetExceeded(message)
+        logger.warning(message)
+
+
+class ReplicaPinMiddleware:
+    """Keeping clients that wrote on the primary until the replica has
+    their writes.
+
+    Responses to unsafe requests stamp the time in a session cookie that
+    blog.replica compares with the last replica sync.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if asyncio.iscoroutinefunction(get_response):
+            self._is_coroutine = asyncio.coroutines._is_coroutine
+
+    def __call__(self, request):
+        if asyncio.iscoroutinefunction(self.get_response):
+            return self.__acall__(request)
+        return self.pin(request, self.get_response(request))
+
+    async def __acall__(self, request):
+        return self.pin(request, await self.get_response(request))
+
+    def pin(self, request, response):
+        if settings.BLOG_USE_REPLICA and request.method not in SAFE_METHODS:
+            response.set_cookie(
+                PIN_COOKIE, f'{time.time():.6f}', httponly=True,
+                samesite='Lax',
+            )
+        return response
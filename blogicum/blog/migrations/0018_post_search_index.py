@@ -0,0 +1,28 @@
+# Generated by Django 3.2.16 on 2026-10-17 07:44
+
+import blog.models
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('blog', '0017_post_search'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PostSearchIndex',
+            fields=[
+                ('post', models.OneToOneField(db_column='rowid', on_delete=django.db.models.deletion.DO_NOTHING, primary_key=True, related_name='search_index', serialize=False, to='blog.post')),
+                ('title', models.TextField()),
+                ('text', models.TextField()),
+                ('document', blog.models.SearchDocumentField(db_column='blog_post_fts')),
+            ],
+            options={
+                'db_table': 'blog_post_fts',
+                'managed': False,
+            },
+        ),
+    ]
@@ -1,17 +1,72 @@
-from django.shortcuts import redirect
+from django.shortcuts import get_object_or_404, redirect
 
-from blog.models import Comment
+from blog.models import Comment, Post
+from blog.utils import paginate_posts
 
 
-class CommentFormMixin:
+class OwnerObjectMixin:
+    """Loading the edited object once per request, scoped to its author"""
+
+    owner_field = 'author'
+    # URL name and the view kwargs it takes, where non-authors are sent.
+    not_owner_redirect = ('blog:index', ())
+
+    def dispatch(self, request, *args, **kwargs):
+        """Сhecking the user for the authorship of the object"""
+        queryset = self.get_queryset()
+        pk = self.kwargs[self.pk_url_kwarg]
+        try:
+            self.object = queryset.get(
+                pk=pk, **{self.owner_field: request.user}
+            )
+        except queryset.model.DoesNotExist:
+            get_object_or_404(queryset, pk=pk)
+            url_name, kwarg_names = self.not_owner_redirect
+            return redirect(
+                url_name, **{name: self.kwargs[name] for name in kwarg_names}
+            )
+        return super().dispatch(request, *args, **kwargs)
+
+    def get_object(self, queryset=None):
+        """Object loaded in dispatch"""
+        return self.object
+
+
+class PostOwnerMixin(OwnerObjectMixin):
+    """Post Mixin for delete and update view"""
+
+    model = Post
+    pk_url_kwarg = 'post_id'
+    not_owner_redirect = ('blog:post_detail', ('post_id',))
+
+
+class CommentFormMixin(OwnerObjectMixin):
     """Comment Mixin for delete and update view"""
 
     model = Comment
     pk_url_kwarg = 'comment_id'
     template_name = 'blog/comment.html'
 
-    def dispatch(self, request, *args, **kwargs):
-        """Сhecking the user for the authorship of the comment"""
-        if self.get_object().author != self.request.user:
-            return redirect('blog:index')
-        return super().dispatch(request, *args, **kwargs)
+    def get_queryset(self):
+        """Comments of the post from the URL only"""
+        return super().get_queryset().filter(post_id=self.kwargs['post_id'])
+
+
+class PostPaginationMixin:
+    """Paginate a post ListView in the configured pagination mode"""
+
+    def get_listing(self):
+        """Name under which the listing total is cached"""
+        return None
+
+    def paginate_queryset(self, queryset, page_size):
+        """Replacing offset pagination with the blog paginators"""
+        page = paginate_posts(
+            self.request, queryset, page_size, listing=self.get_listing()
+        )
+        return (
+            page.paginator,
+            page,
+            page.object_list,
+            page.has_other_pages()
+        )
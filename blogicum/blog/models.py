@@ -1,9 +1,12 @@
 from django.contrib.auth import get_user_model
 from django.db import models
 from django.urls import reverse
-from django.utils.html import mark_safe
+from django.utils import timezone
+from django.utils.html import format_html
 from django.contrib import admin
 
+from blog.images import admin_thumbnail
+
 User = get_user_model()
 
 NUMBER_OF_CHARACTERS_DISPLAYED = 25
@@ -86,24 +89,82 @@ class Post(PublishedAndCreated):
         null=True,
         verbose_name='Категория',
     )
+    comment_count = models.PositiveIntegerField(
+        default=0,
+        editable=False,
+        verbose_name='Количество комментариев',
+    )
+    is_visible = models.BooleanField(
+        default=False,
+        editable=False,
+        verbose_name='Виден в ленте',
+        help_text=(
+            'Опубликован и дата публикации наступила; отложенные посты '
+            'открывает команда publish_scheduled.'
+        )
+    )
+    image_variants = models.JSONField(
+        default=dict,
+        blank=True,
+        editable=False,
+        verbose_name='Уменьшенные копии фото',
+    )
 
     class Meta:
         verbose_name = 'публикация'
         verbose_name_plural = 'Публикации'
         default_related_name = 'posts'
         ordering = ("-pub_date",)
+        indexes = (
+            models.Index(
+                fields=('pub_date', 'id'),
+                condition=models.Q(is_visible=True),
+                name='post_visible_pub_date_idx',
+            ),
+            models.Index(
+                fields=('category', 'pub_date', 'id'),
+                condition=models.Q(is_visible=True),
+                name='post_visible_category_idx',
+            ),
+            models.Index(
+                fields=('pub_date',),
+                condition=models.Q(is_published=True, is_visible=False),
+                name='post_scheduled_idx',
+            ),
+            models.Index(
+                fields=('author', 'pub_date', 'id'),
+                name='post_author_pub_date_idx',
+            ),
+        )
 
     def __str__(self):
         return self.title[:NUMBER_OF_CHARACTERS_DISPLAYED]
 
+    def set_visibility(self):
+        """Whether the post shows in the feed as of now; publish_scheduled
+        keeps it current for scheduled posts"""
+        self.is_visible = self.is_published and (
+            self.pub_date <= timezone.now()
+        )
+
+    def save(self, *args, **kwargs):
+        self.set_visibility()
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None:
+            kwargs['update_fields'] = {*update_fields, 'is_visible'}
+        super().save(*args, **kwargs)
+
     def get_absolute_url(self):
         return reverse('blog.detail', kwargs={'post_id': self.pk})
 
     @admin.display(description='Image')
     def image_tag(self):
         if self.image:
-            return mark_safe(
-                f'<img src="/{self.image}" width="150" height="150" />'
+            url, width, height = admin_thumbnail(self)
+            if width is None:
+                return format_html('<img src="{}" width="150" />', url)
+            return format_html(
+                '<img src="{}" width="{}" height="{}" />', url, width, height
             )
 
     # image_tag.short_description = 'Image'
@@ -125,6 +186,93 @@ class Comment(models.Model):
 
     class Meta:
         ordering = ('created_at',)
+        indexes = (
+            models.Index(
+                fields=('post', 'created_at', 'id'),
+                name='comment_post_created_idx',
+            ),
+        )
 
     def __str__(self):
         return f'{self.comment[:TEXT_CONSTANT]}, {self.author}'
+
+
+class SearchDocumentField(models.TextField):
+    """Hidden column of an FTS5 table that is named after the table"""
+
+
+@SearchDocumentField.register_lookup
+class Match(models.Lookup):
+    """FTS5 full-text query against every column of the table"""
+
+    lookup_name = 'match'
+
+    def as_sql(self, compiler, connection):
+        lhs, lhs_params = self.process_lhs(compiler, connection)
+        rhs, rhs_params = self.process_rhs(compiler, connection)
+        return f'{lhs} MATCH {rhs}', lhs_params + rhs_params
+
+
+class PostSearchIndex(models.Model):
+    """Row of the blog_post_fts index over posts, see blog.search"""
+
+    post = models.OneToOneField(
+        Post,
+        on_delete=models.DO_NOTHING,
+        primary_key=True,
+        db_column='rowid',
+        related_name='search_index',
+    )
+    title = models.TextField()
+    text = models.TextField()
+    document = SearchDocumentField(db_column='blog_post_fts')
+
+    class Meta:
+        # Created and kept in sync by migration 0017, on SQLite only.
+        managed = False
+        db_table = 'blog_post_fts'
+
+
+class ImageJob(models.Model):
+    """Queued resizing of a post image, run by `manage.py run_image_worker`.
+
+    Finished jobs are deleted, failed ones are kept for inspection.
+    """
+
+    PENDING = 'pending'
+    RUNNING = 'running'
+    FAILED = 'failed'
+    STATUSES = (
+        (PENDING, 'В очереди'),
+        (RUNNING, 'Обрабатывается'),
+        (FAILED, 'Ошибка'),
+    )
+
+    post = models.ForeignKey(
+        Post,
+        on_delete=models.CASCADE,
+        related_name='image_jobs',
+        verbose_name='Публикация',
+    )
+    image = models.CharField('Файл фото', max_length=255)
+    status = models.CharField(
+        'Состояние', max_length=16, choices=STATUSES, default=PENDING
+    )
+    attempts = models.PositiveSmallIntegerField('Попытки', default=0)
+    error = models.TextField('Ошибка', blank=True)
+    created_at = models.DateTimeField('Добавлено', auto_now_add=True)
+    locked_at = models.DateTimeField('Взято в работу', null=True, blank=True)
+
+    class Meta:
+        verbose_name = 'обработка фото'
+        verbose_name_plural = 'Обработка фото'
+        ordering = ('created_at',)
+        indexes = (
+            models.Index(
+                fields=('status', 'created_at'),
+                name='image_job_status_idx',
+            ),
+        )
+
+    def __str__(self):
+        return f'{self.image} ({self.get_status_display()})'
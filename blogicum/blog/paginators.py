@@ -0,0 +1,204 @@
+import base64
+import binascii
+
+from django.core.paginator import Paginator
+from django.db import connections
+from django.db.models import Max, Q
+from django.utils.dateparse import parse_datetime
+from django.utils.functional import cached_property
+
+from blog.caching import get_listing_count
+
+CURSOR_SEPARATOR = '|'
+# Unfiltered tables estimated larger than this are not counted exactly.
+ESTIMATED_COUNT_THRESHOLD = 10_000
+
+
+def encode_cursor(obj, field='pub_date'):
+    """Opaque token for the (field, id) position of an object"""
+    value = getattr(obj, field)
+    if hasattr(value, 'isoformat'):
+        value = value.isoformat()
+    raw = f'{value}{CURSOR_SEPARATOR}{obj.pk}'
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip('=')
+
+
+def decode_cursor(token, parse=parse_datetime):
+    """Position from a token, None for a missing or malformed one"""
+    if not token:
+        return None
+    try:
+        raw = base64.urlsafe_b64decode(
+            token + '=' * (-len(token) % 4)
+        ).decode()
+        value, pk = raw.rsplit(CURSOR_SEPARATOR, 1)
+        value = parse(value)
+        pk = int(pk)
+    except (binascii.Error, UnicodeDecodeError, ValueError):
+        return None
+    if value is None:
+        return None
+    return value, pk
+
+
+class KeysetPage:
+    """One page of a keyset paginated listing"""
+
+    def __init__(self, object_list, paginator, has_next, has_previous):
+        self.object_list = object_list
+        self.paginator = paginator
+        self._has_next = has_next
+        self._has_previous = has_previous
+
+    def __repr__(self):
+        return f'<KeysetPage of {len(self)} items>'
+
+    def __len__(self):
+        return len(self.object_list)
+
+    def __iter__(self):
+        return iter(self.object_list)
+
+    def __getitem__(self, index):
+        return self.object_list[index]
+
+    def has_next(self):
+        return self._has_next
+
+    def has_previous(self):
+        return self._has_previous
+
+    def has_other_pages(self):
+        return self.has_next() or self.has_previous()
+
+    @property
+    def next_cursor(self):
+        if self.has_next():
+            return encode_cursor(self.object_list[-1], self.paginator.field)
+
+    @property
+    def previous_cursor(self):
+        if self.has_previous():
+            return encode_cursor(self.object_list[0], self.paginator.field)
+
+
+class KeysetPaginator:
+    """Cursor pagination over a (field, id) pair.
+
+    Pages are fetched with a range predicate on the ordering columns
+    instead of OFFSET, and no COUNT(*) is issued: one extra row is read
+    to find out whether there is anything beyond the current page.
+    Posts default to newest first on pub_date; fields other than
+    datetimes need a `parse` turning the cursor text back into a value.
+    """
+
+    is_keyset = True
+
+    def __init__(
+        self, object_list, per_page, field='pub_date', descending=True,
+        parse=parse_datetime,
+    ):
+        self.object_list = object_list
+        self.per_page = int(per_page)
+        self.field = field
+        self.descending = descending
+        self.parse = parse
+
+    def _ordering(self, reverse=False):
+        sign = '-' if self.descending != reverse else ''
+        return f'{sign}{self.field}', f'{sign}pk'
+
+    def _beyond(self, position, reverse=False):
+        """Rows past a position in the (possibly reversed) page order"""
+        value, pk = position
+        lookup = 'lt' if self.descending != reverse else 'gt'
+        return Q(**{f'{self.field}__{lookup}': value}) | Q(
+            **{self.field: value, f'pk__{lookup}': pk}
+        )
+
+    def get_page(self, after=None, before=None):
+        """Page following the `after` token or preceding `before`"""
+        after = decode_cursor(after, self.parse)
+        before = decode_cursor(before, self.parse) if after is None else None
+        if before is not None:
+            rows = list(self.object_list.filter(
+                self._beyond(before, reverse=True)
+            ).order_by(*self._ordering(reverse=True))[:self.per_page + 1])
+            has_previous = len(rows) > self.per_page
+            rows = rows[:self.per_page]
+            rows.reverse()
+            return KeysetPage(rows, self, True, has_previous)
+        queryset = self.object_list.order_by(*self._ordering())
+        if after is not None:
+            queryset = queryset.filter(self._beyond(after))
+        rows = list(queryset[:self.per_page + 1])
+        has_next = len(rows) > self.per_page
+        return KeysetPage(
+            rows[:self.per_page], self, has_next, after is not None
+        )
+
+
+class NumberedPaginator(Paginator):
+    """Classic page-number pagination for small result sets.
+
+    Given a listing name, the total behind the page links is kept in the
+    cache and dropped by the model signals instead of running COUNT(*)
+    on every request.
+    """
+
+    is_keyset = False
+
+    def __init__(self, object_list, per_page, listing=None, **kwargs):
+        super().__init__(object_list, per_page, **kwargs)
+        self.listing = listing
+
+    @cached_property
+    def count(self):
+        count = Paginator.count.func
+        if self.listing is None:
+            return count(self)
+        return get_listing_count(self.listing, lambda: count(self))
+
+
+def estimate_rows(queryset):
+    """Cheap row estimate of a whole table, None when unavailable.
+
+    PostgreSQL keeps one in its statistics; elsewhere the largest
+    primary key is used, read from the index and only skewed by gaps.
+    """
+    model = queryset.model
+    connection = connections[queryset.db]
+    if connection.vendor == 'postgresql':
+        with connection.cursor() as cursor:
+            cursor.execute(
+                'SELECT reltuples::bigint FROM pg_class '
+                'WHERE oid = %s::regclass',
+                [model._meta.db_table],
+            )
+            row = cursor.fetchone()
+        if row is not None and row[0] >= 0:
+            return row[0]
+        return None
+    if model._meta.pk.get_internal_type() not in (
+        'AutoField', 'BigAutoField', 'SmallAutoField'
+    ):
+        return None
+    return model._base_manager.using(queryset.db).aggregate(
+        last=Max('pk')
+    )['last'] or 0
+
+
+class EstimatedCountPaginator(Paginator):
+    """Admin paginator that skips COUNT(*) on huge unfiltered tables.
+
+    Searches and filters are still counted exactly; the last pages of an
+    estimated listing may come out short or empty.
+    """
+
+    @cached_property
+    def count(self):
+        if not self.object_list.query.where:
+            estimate = estimate_rows(self.object_list)
+            if estimate is not None and estimate > ESTIMATED_COUNT_THRESHOLD:
+                return estimate
+        return super().count
@@ -0,0 +1,130 @@
+"""Reads of the read-only pages from a replica database.
+
+The `replica` alias is a copy of `default` refreshed by `manage.py
+sync_replica`, which touches BLOG_REPLICA_SYNCED_MARKER with the time the
+copy started. Views wrapped in read_from_replica read from it when
+BLOG_USE_REPLICA is set, except for clients that wrote something after
+that time: ReplicaPinMiddleware stamps their last write in a cookie, and
+they read from `default` until the replica has caught up with it.
+Writes always go to `default`. Pages and post cards rendered from a
+replica that may predate their cache version are not stored, so that the
+stale rows cannot be served under the version of the write.
+"""
+import asyncio
+import os
+import sqlite3
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from functools import wraps
+from pathlib import Path
+
+from django.conf import settings
+from django.db import connections
+
+REPLICA = 'replica'
+PIN_COOKIE = 'blog_written_at'
+
+# Alias the reads of the current view go to, None for the default.
+read_alias = ContextVar('blog_read_alias', default=None)
+
+
+class ReplicaRouter:
+    """Routing reads to the alias chosen by read_from_replica"""
+
+    def db_for_read(self, model, **hints):
+        return read_alias.get()
+
+    def db_for_write(self, model, **hints):
+        return 'default'
+
+    def allow_relation(self, obj1, obj2, **hints):
+        return True
+
+    def allow_migrate(self, db, app_label, **hints):
+        # The replica gets its schema with the data it copies.
+        return db != REPLICA
+
+
+def replica_synced_at():
+    """Start time of the last finished replica sync, 0 if never synced"""
+    try:
+        return os.stat(settings.BLOG_REPLICA_SYNCED_MARKER).st_mtime
+    except FileNotFoundError:
+        return 0
+
+
+def replica_behind(version):
+    """Whether the current reads come from a replica that may miss the
+    write stamped with `version`, a time.time_ns() cache version"""
+    return read_alias.get() == REPLICA and (
+        version / 1e9 > replica_synced_at()
+    )
+
+
+def replica_alias(request):
+    """Alias the reads of a request go to"""
+    if not settings.BLOG_USE_REPLICA:
+        return None
+    try:
+        written_at = float(request.COOKIES.get(PIN_COOKIE, 0))
+    except ValueError:
+        written_at = 0
+    synced_at = replica_synced_at()
+    if not synced_at or written_at >= synced_at:
+        return None
+    return REPLICA
+
+
+@contextmanager
+def reading_from(alias):
+    """Routing the reads of the block to an alias"""
+    token = read_alias.set(alias)
+    try:
+        yield
+    finally:
+        read_alias.reset(token)
+
+
+def read_from_replica(view):
+    """Running a read-only view, template rendering included, against
+    the replica when the request may read from it"""
+    if asyncio.iscoroutinefunction(view):
+        @wraps(view)
+        async def async_wrapper(request, *args, **kwargs):
+            with reading_from(replica_alias(request)):
+                return await view(request, *args, **kwargs)
+        return async_wrapper
+
+    @wraps(view)
+    def wrapper(request, *args, **kwargs):
+        with reading_from(replica_alias(request)):
+            response = view(request, *args, **kwargs)
+            if callable(getattr(response, 'render', None)):
+                response.render()
+            return response
+    return wrapper
+
+
+def sync_replica(source='default', target=None, marker=None):
+    """Copying the source database over the replica file.
+
+    The copy goes through the SQLite backup API into the live file, so
+    open replica connections see the new data once it is complete. The
+    marker is touched with the start time of the copy, as writes made
+    during it may be missing.
+    """
+    target = target or connections[REPLICA].settings_dict['NAME']
+    marker = Path(marker or settings.BLOG_REPLICA_SYNCED_MARKER)
+    started_at = time.time()
+    src = sqlite3.connect(str(connections[source].settings_dict['NAME']),
+                          uri=True)
+    dst = sqlite3.connect(str(target))
+    try:
+        src.backup(dst)
+    finally:
+        src.close()
+        dst.close()
+    marker.touch()
+    os.utime(marker, (started_at, started_at))
+    return started_at
@@ -0,0 +1,75 @@
+"""Full-text search over post titles and texts.
+
+On SQLite posts are matched through the blog_post_fts FTS5 index, which
+triggers keep in sync with blog_post (migration 0017), and ranked with
+bm25, lower being better. Other databases fall back to a LIKE scan.
+
+Queries reach the index through the unmanaged PostSearchIndex model and
+its `match` lookup. bm25 is only defined in the query running the MATCH,
+so ranked results join the index rather than filter on matching_ids.
+"""
+import re
+
+from django.db import connections
+from django.db.models import FloatField, Q, Value
+from django.db.models.expressions import RawSQL
+
+from blog.models import PostSearchIndex
+
+FTS_TABLE = 'blog_post_fts'
+# bm25 weights of the title and text columns.
+RANK_SQL = f'bm25({FTS_TABLE}, 10.0, 1.0)'
+MAX_TERMS = 8
+TERM_RE = re.compile(r'\w+')
+
+
+def match_expression(query):
+    """FTS5 query requiring every word of the input, each as a prefix.
+
+    Words are quoted, so operators and stray quotes typed by the user
+    cannot break the query syntax.
+    """
+    terms = TERM_RE.findall(query)[:MAX_TERMS]
+    return ' '.join(f'"{term}"*' for term in terms)
+
+
+def has_index(using='default'):
+    """Whether the database has the FTS5 post index"""
+    return connections[using].vendor == 'sqlite'
+
+
+def matching_ids(match):
+    """Subquery of the ids of posts matching an FTS5 expression"""
+    return PostSearchIndex.objects.filter(document__match=match).values(
+        'post_id'
+    )
+
+
+def search_posts(queryset, query):
+    """Posts of the queryset matching the query, annotated with `rank`
+    when the FTS5 index is available"""
+    match = match_expression(query)
+    if not match:
+        # Annotated all the same, so that it pages like any ranked result.
+        queryset = queryset.none()
+        if has_index(queryset.db):
+            queryset = queryset.annotate(
+                rank=Value(0.0, output_field=FloatField())
+            )
+        return queryset
+    if not has_index(queryset.db):
+        words = Q()
+        for term in TERM_RE.findall(query)[:MAX_TERMS]:
+            words &= Q(title__icontains=term) | Q(text__icontains=term)
+        return queryset.filter(words)
+    return queryset.filter(search_index__document__match=match).annotate(
+        rank=RawSQL(RANK_SQL, ())
+    )
+
+
+def rebuild_index(using='default'):
+    """Rebuilding the FTS5 index from the posts table"""
+    with connections[using].cursor() as cursor:
+        cursor.execute(
+            f"INSERT INTO {FTS_TABLE}({FTS_TABLE}) VALUES ('rebuild')"
+        )
@@ -0,0 +1,319 @@
+import threading
+from functools import partial
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Count, F, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+from django.db.models.signals import (
+    post_delete,
+    post_save,
+    pre_delete,
+    pre_save
+)
+from django.dispatch import receiver
+
+from blog.caching import (
+    INDEX_LISTING,
+    PostListings,
+    bump_version,
+    bump_versions,
+    category_listing,
+    invalidate_all_counts,
+    invalidate_post_counts,
+    profile_listing,
+    purge_pages,
+    purge_post_pages
+)
+from blog.images import delete_variants, process_upload
+from blog.models import Category, Comment, ImageJob, Location, Post, User
+
+LISTING_FIELDS = ('category__slug', 'author_id', 'author__username')
+
+
+def _stored_post_listings(**filters):
+    """PostListings of every stored post matching the filters"""
+    return {
+        PostListings(*row)
+        for row in Post.objects.filter(**filters).values_list(
+            *LISTING_FIELDS
+        ).distinct()
+    }
+
+
+def _post_listings(post):
+    """PostListings of a post instance as it is about to be stored"""
+    slug = None
+    if post.category_id is not None:
+        slug = Category.objects.filter(pk=post.category_id).values_list(
+            'slug', flat=True
+        ).first()
+    username = User.objects.filter(pk=post.author_id).values_list(
+        'username', flat=True
+    ).first()
+    return PostListings(slug, post.author_id, username)
+
+
+def count_new_comments(counts):
+    """Adding new comments to the counters of their posts.
+
+    `counts` maps post ids to their number of new comments. Used by the
+    signal below and for the batches of blog.write_queue, which are
+    inserted without signals.
+    """
+    for post_id, count in counts.items():
+        Post.objects.filter(pk=post_id).update(
+            comment_count=F('comment_count') + count
+        )
+    transaction.on_commit(partial(
+        purge_post_pages, *_stored_post_listings(pk__in=counts)
+    ))
+
+
+def refresh_bulk_posts(post_ids, new=False):
+    """Dropping the cached cards, totals and pages of posts written in
+    bulk, which skips the signals below.
+
+    New posts have no cards to retire: deleting a row already bumped the
+    version of its pk, should the pk be reused.
+    """
+    if not new:
+        bump_versions(Post, post_ids)
+    states = _stored_post_listings(pk__in=post_ids)
+    transaction.on_commit(partial(invalidate_post_counts, *states))
+    transaction.on_commit(partial(purge_post_pages, *states))
+
+
+@receiver(post_save, sender=Comment)
+def increment_comment_count(sender, instance, created, raw=False, **kwargs):
+    """Counting a new comment on its post"""
+    if created and not raw:
+        count_new_comments({instance.post_id: 1})
+
+
+class _Deletes(threading.local):
+    """Rows of the deletes running in this thread.
+
+    A delete that fails between pre_delete and post_delete leaves its
+    rows here, so neither set is trusted for counting: they only decide
+    which post_delete recounts a post from the database.
+    """
+
+    def __init__(self):
+        # Posts deleted together with their comments.
+        self.posts = set()
+        # Posts whose comment counter is yet to be recounted.
+        self.comments = set()
+
+
+_deletes = _Deletes()
+
+
+@receiver(pre_delete, sender=Post)
+def remember_deleted_post(sender, instance, **kwargs):
+    _deletes.posts.add(instance.pk)
+
+
+@receiver(post_delete, sender=Post)
+def forget_deleted_post(sender, instance, **kwargs):
+    _deletes.posts.discard(instance.pk)
+
+
+@receiver(pre_delete, sender=Comment)
+def remember_deleted_comment(sender, instance, **kwargs):
+    # Comments get pre_delete before their post, which adds itself back
+    # if it is deleted too; a post left by a failed delete is dropped.
+    _deletes.posts.discard(instance.post_id)
+    _deletes.comments.add(instance.post_id)
+
+
+@receiver(post_delete, sender=Comment)
+def decrement_comment_count(sender, instance, **kwargs):
+    """Recounting the comments of a post, once per post and delete.
+
+    A delete removes all its comment rows before the first post_delete,
+    so the first comment of a post recounts it. Comments deleted along
+    with their post are not counted.
+    """
+    if instance.post_id not in _deletes.comments:
+        return
+    _deletes.comments.discard(instance.post_id)
+    if instance.post_id in _deletes.posts:
+        return
+    Post.objects.filter(pk=instance.post_id).update(
+        comment_count=Coalesce(Subquery(
+            Comment.objects.filter(post=OuterRef('pk')).order_by().values(
+                'post'
+            ).annotate(total=Count('pk')).values('total')
+        ), 0)
+    )
+    transaction.on_commit(partial(
+        purge_post_pages, *_stored_post_listings(pk=instance.post_id)
+    ))
+
+
+@receiver(pre_save, sender=Post)
+def set_loaded_post_visibility(sender, instance, raw=False, **kwargs):
+    """loaddata saves raw, bypassing Post.save(), and fixtures made before
+    is_visible existed would otherwise load as hidden"""
+    if raw:
+        instance.set_visibility()
+
+
+@receiver(pre_save, sender=Post)
+def remember_post_state(sender, instance, raw=False, **kwargs):
+    """Keeping the listings of a post before an edit moves it elsewhere"""
+    instance._previous_state = None
+    if not raw and instance.pk is not None:
+        instance._previous_state = next(
+            iter(_stored_post_listings(pk=instance.pk)), None
+        )
+
+
+@receiver(post_save, sender=Post)
+@receiver(post_delete, sender=Post)
+def invalidate_post_listings(sender, instance, raw=False, **kwargs):
+    """Dropping cached totals and pages of the listings a post left or
+    entered"""
+    if raw:
+        return
+    states = [_post_listings(instance)]
+    previous = getattr(instance, '_previous_state', None)
+    if previous is not None:
+        states.append(previous)
+    transaction.on_commit(partial(invalidate_post_counts, *states))
+    transaction.on_commit(partial(purge_post_pages, *states))
+
+
+@receiver(pre_save, sender=Post)
+def remember_image_upload(
+    sender, instance, raw=False, update_fields=None, **kwargs
+):
+    """Noting a new upload before the image field stores the file"""
+    instance._image_uploaded = False
+    if raw or (update_fields is not None and 'image' not in update_fields):
+        return
+    instance._image_uploaded = bool(instance.image) and (
+        not instance.image._committed
+    )
+
+
+@receiver(post_save, sender=Post)
+def refresh_image_variants(
+    sender, instance, raw=False, update_fields=None, **kwargs
+):
+    """Replacing the resized copies of an uploaded or removed image"""
+    if raw or (update_fields is not None and 'image' not in update_fields):
+        return
+    uploaded = getattr(instance, '_image_uploaded', False)
+    if not uploaded and (instance.image or not instance.image_variants):
+        return
+    stale = instance.image_variants
+    transaction.on_commit(lambda: delete_variants(stale))
+    instance.image_variants = {}
+    if uploaded and settings.BLOG_IMAGE_PROCESSING == 'inline':
+        instance.image_variants = process_upload(instance.image.name)
+    elif uploaded:
+        # Resized and stripped by run_image_worker; the original is
+        # served as uploaded meanwhile.
+        instance.image_jobs.filter(status=ImageJob.PENDING).delete()
+        ImageJob.objects.create(post=instance, image=instance.image.name)
+    Post.objects.filter(pk=instance.pk).update(
+        image_variants=instance.image_variants
+    )
+
+
+@receiver(post_delete, sender=Post)
+def delete_image_variants(sender, instance, **kwargs):
+    """Removing the resized copies once the post is gone"""
+    variants = instance.image_variants
+    if variants:
+        transaction.on_commit(lambda: delete_variants(variants))
+
+
+@receiver(pre_save, sender=Category)
+def remember_category_slug(sender, instance, raw=False, **kwargs):
+    """Keeping the slug the category pages were cached under"""
+    instance._previous_slug = None
+    if not raw and instance.pk is not None:
+        instance._previous_slug = Category.objects.filter(
+            pk=instance.pk
+        ).values_list('slug', flat=True).first()
+
+
+@receiver(post_save, sender=Category)
+@receiver(post_delete, sender=Category)
+def invalidate_category_listings(sender, instance, raw=False, **kwargs):
+    """Publishing or hiding a category changes every listing total and
+    the pages of the category, the feed and the authors who use it"""
+    if raw:
+        return
+    transaction.on_commit(invalidate_all_counts)
+    listings = {INDEX_LISTING, category_listing(instance.slug)}
+    previous_slug = getattr(instance, '_previous_slug', None)
+    if previous_slug is not None:
+        listings.add(category_listing(previous_slug))
+    listings.update(
+        profile_listing(username)
+        for username in User.objects.filter(
+            posts__category=instance.pk
+        ).values_list('username', flat=True).distinct()
+    )
+    transaction.on_commit(partial(purge_pages, *listings))
+
+
+@receiver(post_save, sender=Location)
+@receiver(pre_delete, sender=Location)
+def invalidate_location_listings(sender, instance, raw=False, **kwargs):
+    """Dropping the pages whose cards show the location"""
+    if not raw:
+        transaction.on_commit(partial(
+            purge_post_pages, *_stored_post_listings(location=instance.pk)
+        ))
+
+
+@receiver(pre_save, sender=User)
+def remember_username(
+    sender, instance, raw=False, update_fields=None, **kwargs
+):
+    """Keeping the username the profile pages were cached under"""
+    instance._previous_username = None
+    if update_fields == frozenset({'last_login'}):
+        return
+    if not raw and instance.pk is not None:
+        instance._previous_username = User.objects.filter(
+            pk=instance.pk
+        ).values_list('username', flat=True).first()
+
+
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+def invalidate_profile_listings(
+    sender, instance, raw=False, update_fields=None, **kwargs
+):
+    """Dropping the profile pages of an edited user, and every page with
+    their cards when the username shown on them changes"""
+    if raw or update_fields == frozenset({'last_login'}):
+        return
+    previous = getattr(instance, '_previous_username', None)
+    listings = {profile_listing(instance.username)}
+    if previous is not None and previous != instance.username:
+        listings.add(profile_listing(previous))
+        transaction.on_commit(partial(
+            purge_post_pages, *_stored_post_listings(author=instance.pk)
+        ))
+    transaction.on_commit(partial(purge_pages, *listings))
+
+
+@receiver(post_save, sender=Post)
+@receiver(post_delete, sender=Post)
+@receiver(post_save, sender=Category)
+@receiver(post_delete, sender=Category)
+@receiver(post_save, sender=Location)
+@receiver(post_delete, sender=Location)
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+def invalidate_post_cards(sender, instance, raw=False, **kwargs):
+    """Dropping rendered post cards that show the changed row"""
+    if not raw:
+        bump_version(instance)
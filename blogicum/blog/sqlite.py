@@ -0,0 +1,27 @@
+"""Connection profile of the SQLite databases.
+
+Every new SQLite connection runs the PRAGMAs of BLOG_SQLITE_PRAGMAS. WAL
+lets readers go on while a writer commits, busy_timeout makes writers
+wait for the write lock instead of failing with "database is locked",
+and mmap_size and cache_size keep the hot pages in memory.
+"""
+from django.conf import settings
+from django.db.backends.signals import connection_created
+from django.dispatch import receiver
+
+
+def apply_pragmas(connection, pragmas):
+    """Running `PRAGMA name = value` on a DB-API connection"""
+    for name, value in pragmas.items():
+        connection.execute(f'PRAGMA {name} = {value}')
+
+
+@receiver(connection_created)
+def configure_sqlite(sender, connection, **kwargs):
+    """Applying BLOG_SQLITE_PRAGMAS to a new SQLite connection.
+
+    The PRAGMAs run on the raw sqlite3 connection, so they are not
+    counted as queries of the request that opened it.
+    """
+    if connection.vendor == 'sqlite':
+        apply_pragmas(connection.connection, settings.BLOG_SQLITE_PRAGMAS)
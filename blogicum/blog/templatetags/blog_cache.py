@@ -0,0 +1,11 @@
+from django import template
+
+from blog.caching import render_post_cards
+
+register = template.Library()
+
+
+@register.simple_tag
+def post_cards(posts):
+    """Rendered includes/post_card.html for each post, cached per post"""
+    return render_post_cards(posts)
@@ -0,0 +1,31 @@
+from django import template
+
+from blog.images import ADMIN_VARIANT, srcset
+
+register = template.Library()
+
+
+@register.inclusion_tag('includes/post_image.html')
+def post_image(post, variant):
+    """Post image served and linked from its resized copies, original
+    as fallback"""
+    variants = post.image_variants
+    context = {
+        'post': post, 'src': post.image.url, 'href': post.image.url,
+        'srcset': '',
+    }
+    if variant in variants:
+        chosen = variants[variant]
+        largest = max(
+            (value for key, value in variants.items()
+             if key != ADMIN_VARIANT),
+            key=lambda value: value['width'],
+        )
+        context.update(
+            src=post.image.storage.url(chosen['name']),
+            href=post.image.storage.url(largest['name']),
+            srcset=srcset(variants, post.image.storage),
+            width=chosen['width'],
+            height=chosen['height'],
+        )
+    return context
@@ -1,9 +1,21 @@
+from django.conf import settings
 from django.urls import path
 
-from . import views
+from . import async_views, views
 
 app_name = 'blog'
 
+if settings.BLOG_ASYNC_VIEWS:
+    index_view = async_views.index
+    profile_view = async_views.profile
+    post_detail_view = async_views.post_detail
+    category_posts_view = async_views.category_posts
+else:
+    index_view = views.IndexView.as_view()
+    profile_view = views.ProfileListViews.as_view()
+    post_detail_view = views.PostDetailViews.as_view()
+    category_posts_view = views.category_posts
+
 
 urlpatterns = [
     path(
@@ -16,7 +28,7 @@ urlpatterns = [
         views.CommentDeleteViews.as_view(),
         name='delete_comment'
     ),
-    path('', views.IndexView.as_view(), name='index'),
+    path('', index_view, name='index'),
     path(
         'profile/edit/',
         views.ProfileUpdateViews.as_view(),
@@ -24,7 +36,7 @@ urlpatterns = [
     ),
     path(
         'profile/<slug:username>/',
-        views.ProfileListViews.as_view(),
+        profile_view,
         name='profile'
     ),
     path(
@@ -34,9 +46,14 @@ urlpatterns = [
     ),
     path(
         'posts/<int:post_id>/',
-        views.PostDetailViews.as_view(),
+        post_detail_view,
         name='post_detail'
     ),
+    path(
+        'posts/<int:post_id>/comments/',
+        views.PostCommentsViews.as_view(),
+        name='post_comments'
+    ),
     path(
         'posts/<int:post_id>/edit/',
         views.PostUpdateViews.as_view(),
@@ -52,8 +69,9 @@ urlpatterns = [
         views.CommentCreateViews.as_view(),
         name='add_comment'
     ),
+    path('search/', views.search, name='search'),
     path(
         'category/<slug:category_slug>/',
-        views.category_posts,
+        category_posts_view,
         name='category_posts'),
 ]
@@ -1,7 +1,9 @@
-from django.db.models import Count
-from django.utils import timezone
+from django.conf import settings
+from django.shortcuts import get_object_or_404
 
-from blog.models import Post
+from blog.models import Post, User
+from blog.paginators import KeysetPaginator, NumberedPaginator
+from blog.search import has_index
 
 
 def get_request():
@@ -10,7 +12,82 @@ def get_request():
         "location",
         "author"
     ).filter(
-        is_published=True,
-        category__is_published=True,
-        pub_date__lte=timezone.now()).annotate(
-        comment_count=Count('comments'))
+        is_visible=True,
+        category__is_published=True)
+
+
+def can_view_post(user, post):
+    """Hidden posts and posts of hidden categories are for the author"""
+    return post.author == user or (
+        post.is_visible and post.category.is_published
+    )
+
+
+def get_profile_posts(request, user):
+    """Posts of a profile, hidden ones included for its owner"""
+    if user == request.user:
+        return Post.objects.select_related(
+            'location',
+            'category',
+            'author'
+        ).filter(
+            author=user
+        ).order_by(
+            '-pub_date'
+        )
+    return get_request().filter(
+        author=user
+    ).order_by(
+        '-pub_date'
+    )
+
+
+def get_user_by_username(request, username):
+    """User looked up at most once per request, none for the session user"""
+    users = request.__dict__.setdefault('_users_by_username', {})
+    if username not in users:
+        if (
+            request.user.is_authenticated
+            and request.user.get_username() == username
+        ):
+            users[username] = request.user
+        else:
+            users[username] = get_object_or_404(User, username=username)
+    return users[username]
+
+
+def paginate_posts(request, queryset, per_page, listing=None):
+    """Page of posts in the pagination mode configured for the blog"""
+    if settings.BLOG_PAGINATION_MODE == 'numbered':
+        paginator = NumberedPaginator(queryset, per_page, listing=listing)
+        return paginator.get_page(request.GET.get('page'))
+    paginator = KeysetPaginator(queryset, per_page)
+    return paginator.get_page(
+        after=request.GET.get('after'),
+        before=request.GET.get('before'),
+    )
+
+
+def paginate_comments(request, post, per_page):
+    """Oldest-first page of post comments after the ?after= cursor"""
+    paginator = KeysetPaginator(
+        post.comments.select_related('author'),
+        per_page,
+        field='created_at',
+        descending=False,
+    )
+    return paginator.get_page(after=request.GET.get('after'))
+
+
+def paginate_search(request, queryset, per_page):
+    """Best ranked page of search results, by date without the index"""
+    if has_index(queryset.db):
+        paginator = KeysetPaginator(
+            queryset, per_page, field='rank', descending=False, parse=float
+        )
+    else:
+        paginator = KeysetPaginator(queryset, per_page)
+    return paginator.get_page(
+        after=request.GET.get('after'),
+        before=request.GET.get('before'),
+    )
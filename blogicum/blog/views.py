@@ -1,10 +1,9 @@
 from django.contrib.auth.mixins import LoginRequiredMixin
-from django.core.paginator import Paginator
-from django.db.models import Count
-from django.http import Http404
-from django.shortcuts import get_object_or_404, render, redirect
+from django.http import Http404, HttpResponseRedirect
+from django.shortcuts import get_object_or_404, render
+from django.utils.http import urlencode
 from django.urls import reverse_lazy, reverse
-from django.utils import timezone
+from django.utils.decorators import method_decorator
 from django.views.generic import (
     CreateView,
     DeleteView,
@@ -13,15 +12,42 @@ from django.views.generic import (
     UpdateView
 )
 
+from blog.caching import (
+    INDEX_LISTING,
+    author_listing,
+    cache_anonymous_page,
+    category_listing,
+    profile_listing
+)
 from blog.forms import CommentForm, CreatePostForm, UserForm
-from blog.mixins import CommentFormMixin
-from blog.models import Category, Comment, Post, User
-from blog.utils import get_request
+from blog.mixins import (
+    CommentFormMixin,
+    PostOwnerMixin,
+    PostPaginationMixin
+)
+from blog.models import Category, Comment, Post
+from blog.replica import read_from_replica
+from blog.search import search_posts
+from blog.utils import (
+    can_view_post,
+    get_profile_posts,
+    get_request,
+    get_user_by_username,
+    paginate_comments,
+    paginate_posts,
+    paginate_search
+)
+from blog.write_queue import save_comment
 
 PAGINATOR_NUM = 10
+COMMENTS_PAGINATOR_NUM = 50
 
 
-class IndexView(ListView):
+@method_decorator(read_from_replica, name='dispatch')
+@method_decorator(
+    cache_anonymous_page(lambda: INDEX_LISTING), name='dispatch'
+)
+class IndexView(PostPaginationMixin, ListView):
     """Homepage"""
 
     model = Post
@@ -32,7 +58,15 @@ class IndexView(ListView):
         """Post"""
         return get_request().order_by('-pub_date')
 
+    def get_listing(self):
+        """Global feed total"""
+        return INDEX_LISTING
 
+
+@read_from_replica
+@cache_anonymous_page(
+    lambda category_slug: category_listing(category_slug)
+)
 def category_posts(request, category_slug):
     """Page output category_posts"""
     category = get_object_or_404(
@@ -41,30 +75,52 @@ def category_posts(request, category_slug):
         is_published=True
     )
     post = get_request().filter(category=category).order_by('-pub_date')
-    paginator = Paginator(post, PAGINATOR_NUM)
-    page_number = request.GET.get('page')
-    page_obj = paginator.get_page(page_number)
+    page_obj = paginate_posts(
+        request, post, PAGINATOR_NUM, listing=category_listing(category.slug)
+    )
     context = {"page_obj": page_obj, }
     return render(request, "blog/category.html", context)
 
 
+def search(request):
+    """Posts matching the ?q= words, best match first"""
+    query = request.GET.get('q', '').strip()
+    page_obj = None
+    if query:
+        page_obj = paginate_search(
+            request, search_posts(get_request(), query), PAGINATOR_NUM
+        )
+    context = {
+        'query': query,
+        'page_obj': page_obj,
+        'page_params': urlencode({'q': query}) + '&',
+    }
+    return render(request, 'blog/search.html', context)
+
+
+@method_decorator(read_from_replica, name='dispatch')
 class PostDetailViews(DetailView):
     """Post detail"""
 
     model = Post
     template_name = 'blog/detail.html'
     pk_url_kwarg = 'post_id'
+    comments_paginate_by = COMMENTS_PAGINATOR_NUM
+
+    def get_queryset(self):
+        """Post with its category, location and author in one query"""
+        return super().get_queryset().select_related(
+            'category',
+            'location',
+            'author'
+        )
 
     def get_object(self, queryset=None):
         """Checking for user access to editing a post"""
         post_object = super(PostDetailViews, self).get_object(
             queryset=queryset
         )
-        if post_object.author != self.request.user and (
-                not post_object.is_published
-                or not post_object.category.is_published
-                or post_object.pub_date > timezone.now()
-        ):
+        if not can_view_post(self.request.user, post_object):
             raise Http404
         return post_object
 
@@ -72,10 +128,18 @@ class PostDetailViews(DetailView):
         """Update context"""
         context = super().get_context_data(**kwargs)
         context['form'] = CommentForm()
-        context['comments'] = self.object.comments.select_related('author')
+        context['comments'] = paginate_comments(
+            self.request, self.object, self.comments_paginate_by
+        )
         return context
 
 
+class PostCommentsViews(PostDetailViews):
+    """Next batch of rendered comments for the post page"""
+
+    template_name = 'includes/comment_list.html'
+
+
 class PostCreateViews(LoginRequiredMixin, CreateView):
     """Post create"""
 
@@ -96,19 +160,11 @@ class PostCreateViews(LoginRequiredMixin, CreateView):
         )
 
 
-class PostUpdateViews(LoginRequiredMixin, UpdateView):
+class PostUpdateViews(LoginRequiredMixin, PostOwnerMixin, UpdateView):
     """Post eding"""
 
-    model = Post
     form_class = CreatePostForm
     template_name = 'blog/create.html'
-    pk_url_kwarg = 'post_id'
-
-    def dispatch(self, request, *args, **kwargs):
-        """Checking for user access to editing a post"""
-        if self.get_object().author != self.request.user:
-            return redirect('blog:post_detail', post_id=self.kwargs['post_id'])
-        return super().dispatch(request, *args, **kwargs)
 
     def get_success_url(self):
         """User translation after successful post editing"""
@@ -118,19 +174,11 @@ class PostUpdateViews(LoginRequiredMixin, UpdateView):
         )
 
 
-class PostDeleteViews(LoginRequiredMixin, DeleteView):
+class PostDeleteViews(LoginRequiredMixin, PostOwnerMixin, DeleteView):
     """Delete post"""
 
-    model = Post
     success_url = reverse_lazy('blog:index')
     template_name = 'blog/create.html'
-    pk_url_kwarg = 'post_id'
-
-    def dispatch(self, request, *args, **kwargs):
-        """Сhecking the user for the authorship of the post"""
-        if self.get_object().author != self.request.user:
-            return redirect('blog:post_detail', post_id=self.kwargs['post_id'])
-        return super().dispatch(request, *args, **kwargs)
 
     def get_context_data(self, **kwargs):
         """Update context"""
@@ -139,7 +187,11 @@ class PostDeleteViews(LoginRequiredMixin, DeleteView):
         return context
 
 
-class ProfileListViews(ListView):
+@method_decorator(read_from_replica, name='dispatch')
+@method_decorator(
+    cache_anonymous_page(profile_listing), name='dispatch'
+)
+class ProfileListViews(PostPaginationMixin, ListView):
     """Profile page"""
 
     model = Post
@@ -149,34 +201,20 @@ class ProfileListViews(ListView):
 
     def get_queryset(self):
         """Obtaining user information"""
-        user = get_object_or_404(
-            User,
-            username=self.kwargs['username']
-        )
-        if user == self.request.user:
-            return Post.objects.select_related(
-                'location',
-                'category',
-                'author'
-            ).filter(
-                author=user
-            ).order_by(
-                '-pub_date'
-            ).annotate(comment_count=Count('comments'))
-        return get_request().filter(
-            author=user
-        ).order_by(
-            '-pub_date'
-        ).annotate(comment_count=Count('comments'))
+        user = get_user_by_username(self.request, self.kwargs['username'])
+        return get_profile_posts(self.request, user)
+
+    def get_listing(self):
+        """Profile total, separate for the owner who sees hidden posts"""
+        user = get_user_by_username(self.request, self.kwargs['username'])
+        return author_listing(user.pk, own=user == self.request.user)
 
     def get_context_data(self, **kwargs):
         """Update context"""
         context = super().get_context_data(**kwargs)
-        user = get_object_or_404(
-            User,
-            username=self.kwargs['username']
+        context['profile'] = get_user_by_username(
+            self.request, self.kwargs['username']
         )
-        context['profile'] = user
         return context
 
 
@@ -215,7 +253,9 @@ class CommentCreateViews(LoginRequiredMixin, CreateView):
             category__is_published=True,
             is_published=True
         )
-        return super().form_valid(form)
+        self.object = form.instance
+        save_comment(self.object)
+        return HttpResponseRedirect(self.get_success_url())
 
     def get_success_url(self):
         """User translation after successful comment create"""
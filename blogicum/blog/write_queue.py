@@ -0,0 +1,157 @@
+"""Coalescing comment writes into batched transactions.
+
+SQLite lets one connection write at a time, so comments submitted
+together queue up for the write lock, each paying for its own commit.
+CommentCreateViews hands new comments to one writer thread per process
+instead. The writer inserts whatever has queued up, at most
+BLOG_WRITE_QUEUE_BATCH comments, and updates their post counters in a
+single transaction, while each request waits for the outcome of its own
+comment. A locked database is retried with exponential backoff.
+
+Comments are saved synchronously when the queue is disabled or full, when
+the writer does not pick them up in time, and when the caller is inside
+a transaction that the comment has to be part of.
+"""
+import queue
+import threading
+import time
+from collections import Counter
+from concurrent import futures
+
+from django.conf import settings
+from django.db import (
+    OperationalError,
+    close_old_connections,
+    connection,
+    transaction
+)
+
+from blog.models import Comment
+from blog.signals import count_new_comments
+
+# Pause before the first retry of a locked batch, doubled on each retry.
+RETRY_DELAY = 0.05
+
+
+def write_comments(comments):
+    """Inserting comments and counting them in one transaction"""
+    with transaction.atomic():
+        Comment.objects.bulk_create(comments)
+        count_new_comments(Counter(comment.post_id for comment in comments))
+
+
+def write_with_retries(comments):
+    """Writing a batch, backing off while the database is locked"""
+    retries = settings.BLOG_WRITE_QUEUE_RETRIES
+    for attempt in range(retries + 1):
+        try:
+            return write_comments(comments)
+        except OperationalError:
+            if attempt == retries:
+                raise
+            time.sleep(RETRY_DELAY * 2 ** attempt)
+
+
+class CommentWriter:
+    """Queue of unsaved comments drained by one writer thread.
+
+    `written` and `batches` count the comments and transactions written
+    since the start of the process.
+    """
+
+    def __init__(self, maxsize=None):
+        self.queue = queue.Queue(
+            maxsize=maxsize or settings.BLOG_WRITE_QUEUE_SIZE
+        )
+        self.lock = threading.Lock()
+        self.thread = None
+        self.written = 0
+        self.batches = 0
+
+    def start(self):
+        """Starting the writer thread, again after a fork"""
+        with self.lock:
+            if self.thread is None or not self.thread.is_alive():
+                self.thread = threading.Thread(
+                    target=self.run, name='blog-comment-writer', daemon=True
+                )
+                self.thread.start()
+
+    def submit(self, comment):
+        """Future of a queued comment, None when the queue is full"""
+        self.start()
+        future = futures.Future()
+        try:
+            self.queue.put_nowait((comment, future))
+        except queue.Full:
+            return None
+        return future
+
+    def stop(self):
+        """Writing the queued comments and ending the writer thread"""
+        with self.lock:
+            if self.thread is not None and self.thread.is_alive():
+                self.queue.put((None, None))
+                self.thread.join()
+
+    def run(self):
+        while True:
+            batch = [self.queue.get()]
+            while len(batch) < settings.BLOG_WRITE_QUEUE_BATCH:
+                try:
+                    batch.append(self.queue.get_nowait())
+                except queue.Empty:
+                    break
+            # (None, None) is queued by stop().
+            stopping = (None, None) in batch
+            batch = [
+                (comment, future) for comment, future in batch
+                if future is not None and future.set_running_or_notify_cancel()
+            ]
+            if batch:
+                close_old_connections()
+                self.write(batch)
+            if stopping:
+                connection.close()
+                return
+
+    def write(self, batch):
+        """Writing a batch and resolving the futures of its comments.
+
+        A batch failing for another reason than a locked database is
+        written again comment by comment, so that one bad comment, e.g.
+        on a post deleted in the meantime, fails alone.
+        """
+        try:
+            write_with_retries([comment for comment, _ in batch])
+        except OperationalError as error:
+            for _, future in batch:
+                future.set_exception(error)
+        except Exception as error:
+            if len(batch) == 1:
+                batch[0][1].set_exception(error)
+                return
+            for item in batch:
+                self.write([item])
+        else:
+            self.written += len(batch)
+            self.batches += 1
+            for _, future in batch:
+                future.set_result(None)
+
+
+writer = CommentWriter()
+
+
+def save_comment(comment):
+    """Saving a new comment through the writer when it can take it"""
+    if settings.BLOG_WRITE_QUEUE and not connection.in_atomic_block:
+        future = writer.submit(comment)
+        if future is not None:
+            try:
+                return future.result(settings.BLOG_WRITE_QUEUE_TIMEOUT)
+            except futures.TimeoutError:
+                if not future.cancel():
+                    return future.result()
+    with transaction.atomic():
+        comment.save()
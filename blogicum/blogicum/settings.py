@@ -1,3 +1,4 @@
+import os
 from pathlib import Path
 
 BASE_DIR = Path(__file__).resolve().parent.parent
@@ -24,6 +25,8 @@ INSTALLED_APPS = [
 
 MIDDLEWARE = [
     'django.middleware.security.SecurityMiddleware',
+    'blog.middleware.QueryInstrumentationMiddleware',
+    'blog.middleware.ReplicaPinMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
@@ -58,13 +61,38 @@ TEMPLATES = [
 
 WSGI_APPLICATION = 'blogicum.wsgi.application'
 
+# Shared by the web workers and the management commands, which purge the
+# pages and cards they change. Use Memcached when serving from several hosts.
+CACHES = {
+    'default': {
+        'BACKEND': 'blog.cache_backends.SharedFileCache',
+        'LOCATION': str(BASE_DIR / 'cache'),
+        'OPTIONS': {
+            'MAX_ENTRIES': 100_000,
+            # Sets between two scans of the directory for MAX_ENTRIES.
+            'CULL_EVERY': 100,
+        },
+    }
+}
+
 DATABASES = {
     'default': {
         'ENGINE': 'django.db.backends.sqlite3',
         'NAME': BASE_DIR / 'db.sqlite3',
-    }
+        # Seconds a thread keeps its connection across requests.
+        'CONN_MAX_AGE': 60,
+    },
+    # Copy of default refreshed by `manage.py sync_replica` (blog/replica.py).
+    'replica': {
+        'ENGINE': 'django.db.backends.sqlite3',
+        'NAME': BASE_DIR / 'db.replica.sqlite3',
+        'CONN_MAX_AGE': 60,
+        'TEST': {'MIRROR': 'default'},
+    },
 }
 
+DATABASE_ROUTERS = ['blog.replica.ReplicaRouter']
+
 AUTH_PASSWORD_VALIDATORS = [
     {
         'NAME': 'django.contrib.auth.password_validation.UserAttributeSimilarityValidator',
@@ -109,3 +137,91 @@ CSRF_FAILURE_VIEW = 'pages.views.csrf_failure'
 LOGIN_REDIRECT_URL = '/'
 
 LOGIN_URL = 'login'
+
+# 'keyset' pages feeds with ?after=/?before= cursors on (pub_date, id);
+# 'numbered' keeps ?page=N with a COUNT(*), fine for small result sets.
+BLOG_PAGINATION_MODE = 'keyset'
+
+# Safety net for totals changed by writes that bypass model signals.
+# Scheduled posts are opened by `manage.py publish_scheduled --loop`.
+BLOG_COUNT_CACHE_TIMEOUT = 60 * 5
+
+BLOG_CARD_CACHE_TIMEOUT = 60 * 60 * 24
+
+BLOG_PAGE_CACHE_TIMEOUT = 60 * 10
+
+# Most queries a view may run, session and user lookups included.
+# BLOG_QUERY_BUDGET_ACTION is 'log' for a warning or 'raise' for an error.
+BLOG_QUERY_BUDGETS = {
+    'blog:index': 3,
+    'blog:category_posts': 4,
+    'blog:profile': 4,
+    'blog:post_detail': 4,
+    'blog:post_comments': 4,
+    'blog:search': 3,
+    'pages:about': 2,
+    'pages:rules': 2,
+}
+BLOG_QUERY_BUDGET_ACTION = 'log'
+
+# Bounding boxes of the resized copies stored next to each post image;
+# existing images are processed by `manage.py generate_image_variants`.
+BLOG_IMAGE_VARIANTS = {
+    'admin': (150, 150),
+    'card': (640, 640),
+    'detail': (1280, 1280),
+}
+
+# PRAGMAs run on every new SQLite connection (blog/sqlite.py). Negative
+# cache_size is in KiB, busy_timeout is in milliseconds.
+BLOG_SQLITE_PRAGMAS = {
+    'journal_mode': 'wal',
+    'synchronous': 'normal',
+    'mmap_size': 256 * 1024 * 1024,
+    'cache_size': -64 * 1024,
+    'temp_store': 'memory',
+    'busy_timeout': 5000,
+}
+
+# New comments are written in batches by one thread per process
+# (blog/write_queue.py): at most BLOG_WRITE_QUEUE_BATCH per transaction,
+# BLOG_WRITE_QUEUE_SIZE waiting, BLOG_WRITE_QUEUE_TIMEOUT seconds before a
+# request saves its comment itself, BLOG_WRITE_QUEUE_RETRIES on a locked
+# database.
+BLOG_WRITE_QUEUE = True
+BLOG_WRITE_QUEUE_BATCH = 50
+BLOG_WRITE_QUEUE_SIZE = 1000
+BLOG_WRITE_QUEUE_TIMEOUT = 5
+BLOG_WRITE_QUEUE_RETRIES = 5
+
+# The read-only pages read from the replica when BLOG_USE_REPLICA is set,
+# once `manage.py sync_replica` has touched the marker.
+BLOG_USE_REPLICA = os.environ.get('BLOG_USE_REPLICA') == '1'
+BLOG_REPLICA_SYNCED_MARKER = BASE_DIR / 'db.replica.synced'
+
+# blogicum/asgi.py switches the feed, category, post and profile pages to
+# their async versions; BLOG_ASYNC_THREADS bounds the threads, and so the
+# database connections, those views use for ORM, cache and rendering.
+BLOG_ASYNC_VIEWS = os.environ.get('BLOG_ASYNC_VIEWS') == '1'
+BLOG_ASYNC_THREADS = 16
+
+# 'worker' resizes new uploads in `manage.py run_image_worker --loop`,
+# 'inline' resizes them during the request.
+BLOG_IMAGE_PROCESSING = 'worker'
+
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'handlers': {
+        'console': {
+            'class': 'logging.StreamHandler',
+        },
+    },
+    'loggers': {
+        'blog.queries': {
+            'handlers': ['console'],
+            'level': 'INFO',
+            'propagate': False,
+        },
+    },
+}
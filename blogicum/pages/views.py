@@ -1,5 +1,8 @@
 from django.views.generic import TemplateView
 from django.shortcuts import render
+from django.utils.decorators import method_decorator
+
+from blog.replica import read_from_replica
 
 
 def page_not_found(request, exception):
@@ -14,9 +17,11 @@ def status_500(request):
     return render(request, 'pages/500.html', status=500)
 
 
+@method_decorator(read_from_replica, name='dispatch')
 class AboutPage(TemplateView):
     template_name = 'pages/about.html'
 
 
+@method_decorator(read_from_replica, name='dispatch')
 class RulesPage(TemplateView):
     template_name = 'pages/rules.html'
@@ -1,3 +1,4 @@
+import multiprocessing
 import os
 import re
 import time
@@ -19,6 +20,7 @@ from typing import (
 import pytest
 from django.apps import apps
 from django.contrib.auth import get_user_model
+from django.db import connections
 from django.db.models import Model, Field
 from django.forms import BaseForm
 from django.http import HttpResponse
@@ -41,6 +43,60 @@ def enable_debug_false():
         yield
 
 
+@pytest.fixture(scope="session", autouse=True)
+def shared_cache(tmp_path_factory):
+    location = tmp_path_factory.mktemp("cache")
+    with override_settings(CACHES={
+        "default": {
+            "BACKEND": "blog.cache_backends.SharedFileCache",
+            "LOCATION": str(location),
+        }
+    }):
+        yield location
+
+
+@pytest.fixture(scope="session")
+def django_db_modify_db_settings(tmp_path_factory):
+    # A database file, unlike the in-memory default, is visible to the
+    # processes started by run_in_another_process.
+    from django.conf import settings
+
+    settings.DATABASES["default"]["TEST"]["NAME"] = str(
+        tmp_path_factory.mktemp("db") / "test.sqlite3"
+    )
+
+
+def _run_child(func, args, kwargs):
+    # Leave the parent's open SQLite handles alone, the child opens its own.
+    for connection in connections.all():
+        connection.connection = None
+    func(*args, **kwargs)
+
+
+def run_in_another_process(func, *args, **kwargs):
+    """Running func in a forked process, e.g. a worker or a command.
+
+    Needs a `transaction=True` test, so that the child sees its data.
+    """
+    process = multiprocessing.get_context("fork").Process(
+        target=_run_child, args=(func, args, kwargs)
+    )
+    process.start()
+    process.join(60)
+    assert process.exitcode == 0, (
+        f"Процесс `{func.__name__}` завершился с кодом {process.exitcode}."
+    )
+
+
+@pytest.fixture(autouse=True)
+def clear_cache():
+    from django.core.cache import cache
+
+    cache.clear()
+    yield
+    cache.clear()
+
+
 class SafeImportFromContextManager:
     def __init__(
             self,
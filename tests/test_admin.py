@@ -0,0 +1,85 @@
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from blog import paginators
+from blog.models import Post
+
+pytestmark = [pytest.mark.django_db]
+
+CHANGELISTS = ("admin:blog_post_changelist", "admin:blog_comment_changelist")
+
+
+def changelist_queries(client, url_name):
+    # The first load generates missing admin thumbnails.
+    client.get(reverse(url_name))
+    with CaptureQueriesContext(connection) as queries:
+        response = client.get(reverse(url_name))
+    assert response.status_code == 200
+    return len(queries)
+
+
+@pytest.mark.parametrize("url_name", CHANGELISTS)
+def test_changelist_queries_constant(
+    admin_client, mixer, post_with_published_location, url_name
+):
+    mixer.blend("blog.Comment", post=post_with_published_location)
+    few = changelist_queries(admin_client, url_name)
+    mixer.cycle(20).blend("blog.Post", category__is_published=True)
+    mixer.cycle(20).blend("blog.Comment")
+    assert changelist_queries(admin_client, url_name) == few, (
+        "Убедитесь, что число запросов списка в админке не зависит от "
+        "количества строк."
+    )
+
+
+def test_changelist_estimated_count(
+    admin_client, mixer, monkeypatch, many_posts_with_published_locations
+):
+    monkeypatch.setattr(paginators, "ESTIMATED_COUNT_THRESHOLD", 5)
+    mixer.blend("blog.Post", id=1000)
+    url = reverse("admin:blog_post_changelist")
+    assert admin_client.get(url).context["cl"].result_count == 1000
+
+    author = many_posts_with_published_locations[0].author
+    response = admin_client.get(url, {"q": author.username})
+    assert response.context["cl"].result_count == Post.objects.filter(
+        author=author
+    ).count(), "Убедитесь, что результаты поиска в админке считаются точно."
+
+
+def test_comment_search_by_exact_username(
+    admin_client, mixer, user, another_user, post_with_published_location
+):
+    comment = mixer.blend(
+        "blog.Comment", post=post_with_published_location, author=user
+    )
+    mixer.blend(
+        "blog.Comment", post=post_with_published_location,
+        author=another_user, comment=user.username,
+    )
+    url = reverse("admin:blog_comment_changelist")
+    with CaptureQueriesContext(connection) as queries:
+        response = admin_client.get(url, {"q": f" {user.username} "})
+    assert list(response.context["cl"].result_list) == [comment]
+    search = [
+        query["sql"] for query in queries
+        if 'FROM "blog_comment"' in query["sql"]
+    ]
+    assert search and not any("LIKE" in sql for sql in search), (
+        "Убедитесь, что комментарии в админке ищутся по точному имени"
+        " автора, без LIKE."
+    )
+
+
+def test_autocomplete_widgets(admin_client):
+    content = admin_client.get(
+        reverse("admin:blog_post_add")
+    ).content.decode("utf-8")
+    for field in ("author", "category", "location"):
+        assert f'id="id_{field}"' in content
+    assert content.count("admin-autocomplete") >= 3, (
+        "Убедитесь, что связанные поля публикации выбираются через "
+        "автодополнение."
+    )
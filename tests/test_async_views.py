@@ -0,0 +1,81 @@
+import pytest
+from django.core.cache import cache
+from django.urls import resolve
+
+from blog import benchmarks
+
+pytestmark = [pytest.mark.django_db(transaction=True)]
+
+
+@pytest.fixture
+def async_views():
+    with benchmarks.blog_views(True):
+        yield
+
+
+def _pages(user, post):
+    return (
+        "/",
+        f"/category/{post.category.slug}/",
+        f"/posts/{post.pk}/",
+        f"/profile/{user.username}/",
+    )
+
+
+def test_async_pages_match_sync_pages(
+        user, user_client, unlogged_client, post_with_published_location,
+        comment_to_a_post,
+):
+    post = post_with_published_location
+    expected = {}
+    for client in (user_client, unlogged_client):
+        for url in _pages(user, post):
+            response = client.get(url)
+            expected[client, url] = (
+                response.status_code, response["Server-Timing"].split(",")[0]
+            )
+
+    cache.clear()
+    with benchmarks.blog_views(True):
+        for client in (user_client, unlogged_client):
+            for url in _pages(user, post):
+                assert resolve(url).func.__module__ == "blog.async_views"
+                response = client.get(url)
+                content = response.content.decode("utf-8")
+                status, db_timing = expected[client, url]
+                assert response.status_code == status == 200
+                assert post.title in content
+                if url.startswith("/posts/"):
+                    assert f'name="comment_{comment_to_a_post.pk}"' in content
+                assert (
+                    response["Server-Timing"].split(",")[0].split("desc=")[1]
+                    == db_timing.split("desc=")[1]
+                ), (
+                    f"Убедитесь, что асинхронная страница `{url}` выполняет"
+                    " столько же запросов, что и синхронная."
+                )
+    assert resolve("/").func.__module__ != "blog.async_views"
+
+
+def test_async_detail_hides_unpublished_post(
+        async_views, user, user_client, unlogged_client,
+        post_with_published_location,
+):
+    post = post_with_published_location
+    post.is_published = False
+    post.save()
+    assert unlogged_client.get(f"/posts/{post.pk}/").status_code == 404, (
+        "Убедитесь, что асинхронная страница поста скрывает снятый с"
+        " публикации пост."
+    )
+    assert user_client.get(f"/posts/{post.pk}/").status_code == 200
+    assert unlogged_client.get("/posts/100500/").status_code == 404
+
+
+@pytest.mark.benchmark
+def test_throughput_serves_every_mode(post_with_published_location):
+    results = benchmarks.throughput(requests=8, concurrency=4)
+    assert set(results) == set(benchmarks.SERVER_MODES)
+    for mode, row in results.items():
+        assert row["errors"] == 0, f"{mode}: {row}"
+        assert row["rps"] > 0
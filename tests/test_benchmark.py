@@ -0,0 +1,28 @@
+import pytest
+
+from blog import benchmarks
+
+pytestmark = [pytest.mark.benchmark, pytest.mark.django_db]
+
+
+def test_benchmark_covers_every_url(mixer, user, comment_to_a_post):
+    report = benchmarks.run(requests=3, warmup=0)
+    results = report["results"]
+    assert not report["skipped"], (
+        f"Убедитесь, что бенчмарк проходит все адреса: {report['skipped']}"
+    )
+    assert set(results) == set(benchmarks.url_names())
+    for name, row in results.items():
+        assert row["status"] == 200, f"{name}: {row}"
+        assert row["p50_ms"] <= row["p95_ms"] <= row["p99_ms"]
+
+    slower = {
+        "results": {
+            name: dict(row, p95_ms=row["p95_ms"] / 10, queries=0)
+            for name, row in results.items()
+        }
+    }
+    assert benchmarks.compare(report, slower), (
+        "Убедитесь, что сравнение с базовой линией находит регрессии."
+    )
+    assert not benchmarks.compare(report, report)
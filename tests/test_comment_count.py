@@ -0,0 +1,88 @@
+import pytest
+from django.core.management import call_command
+from django.db import DatabaseError, transaction
+from django.db.models.signals import pre_delete
+
+from blog.models import Comment, Post
+
+pytestmark = [pytest.mark.django_db]
+
+
+def test_comment_count_follows_comments(
+        mixer, user, post_with_published_location
+):
+    post = post_with_published_location
+    comments = mixer.cycle(3).blend(Comment, post=post, author=user)
+    post.refresh_from_db()
+    assert post.comment_count == 3, (
+        "Убедитесь, что счётчик комментариев увеличивается при их создании."
+    )
+    comments[0].delete()
+    Comment.objects.filter(pk=comments[1].pk).delete()
+    post.refresh_from_db()
+    assert post.comment_count == 1, (
+        "Убедитесь, что счётчик комментариев уменьшается при их удалении."
+    )
+
+
+def test_recount_comments_command(mixer, user, post_with_published_location):
+    post = post_with_published_location
+    mixer.cycle(2).blend(Comment, post=post, author=user)
+    Post.objects.filter(pk=post.pk).update(comment_count=42)
+    call_command("recount_comments", batch_size=1)
+    post.refresh_from_db()
+    assert post.comment_count == 2, (
+        "Убедитесь, что команда `recount_comments` исправляет счётчики."
+    )
+
+
+def test_cascade_deletes_count_once_per_post(
+        mixer, user, another_user, post_with_published_location,
+        django_assert_max_num_queries,
+):
+    post = post_with_published_location
+    mixer.cycle(50).blend(Comment, post=post, author=another_user)
+    with django_assert_max_num_queries(10):
+        post.delete()
+
+    kept = mixer.blend(Post, author=user, category=post.category)
+    own = mixer.blend(Post, author=another_user, category=post.category)
+    mixer.cycle(3).blend(Comment, post=kept, author=another_user)
+    mixer.blend(Comment, post=kept, author=user)
+    mixer.cycle(2).blend(Comment, post=own, author=another_user)
+    another_user.delete()
+    kept.refresh_from_db()
+    assert kept.comment_count == 1 == kept.comments.count(), (
+        "Убедитесь, что удаление пользователя уменьшает счётчики"
+        " комментариев на чужих постах."
+    )
+    assert not Post.objects.filter(pk=own.pk).exists()
+
+
+def test_failed_deletes_do_not_skew_counts(
+        mixer, another_user, post_with_published_location
+):
+    post = post_with_published_location
+    comments = mixer.cycle(3).blend(Comment, post=post, author=another_user)
+
+    def fail(sender, instance, **kwargs):
+        raise DatabaseError("Delete failed")
+
+    pre_delete.connect(fail, sender=Post)
+    pre_delete.connect(fail, sender=Comment)
+    try:
+        for obj in (comments[0], post):
+            with pytest.raises(DatabaseError), transaction.atomic():
+                obj.delete()
+    finally:
+        pre_delete.disconnect(fail, sender=Post)
+        pre_delete.disconnect(fail, sender=Comment)
+    post.refresh_from_db()
+    assert post.comment_count == 3
+
+    comments[1].delete()
+    post.refresh_from_db()
+    assert post.comment_count == 2 == post.comments.count(), (
+        "Убедитесь, что неудавшееся удаление не сбивает счётчик"
+        " комментариев при следующих удалениях."
+    )
@@ -0,0 +1,52 @@
+import pytest
+
+from blog.views import PostDetailViews
+
+pytestmark = [pytest.mark.django_db]
+
+PER_PAGE = 3
+
+
+def test_comments_are_paginated(
+        monkeypatch, mixer, user, user_client, post_with_published_location
+):
+    monkeypatch.setattr(PostDetailViews, "comments_paginate_by", PER_PAGE)
+    post = post_with_published_location
+    comments = mixer.cycle(PER_PAGE * 2 + 1).blend(
+        "blog.Comment", post=post, author=user
+    )
+
+    response = user_client.get(f"/posts/{post.id}/")
+    page = response.context["comments"]
+    assert [c.id for c in page] == [c.id for c in comments[:PER_PAGE]], (
+        "Убедитесь, что на странице поста выводится только первая порция"
+        " комментариев, «от старых к новым»."
+    )
+    assert page.has_next()
+
+    seen = [c.id for c in page]
+    cursor = page.next_cursor
+    while cursor:
+        fragment = user_client.get(
+            f"/posts/{post.id}/comments/?after={cursor}"
+        )
+        assert fragment.status_code == 200
+        assert "<html" not in fragment.content.decode("utf-8"), (
+            "Убедитесь, что адрес подгрузки комментариев возвращает фрагмент"
+            " страницы."
+        )
+        batch = fragment.context["comments"]
+        seen.extend(c.id for c in batch)
+        cursor = batch.next_cursor
+    assert seen == [c.id for c in comments], (
+        "Убедитесь, что подгрузка комментариев по курсору возвращает все"
+        " комментарии без пропусков и повторов."
+    )
+
+
+def test_comments_fragment_of_hidden_post(
+        another_user_client, unpublished_posts_with_published_locations
+):
+    post = unpublished_posts_with_published_locations[0]
+    response = another_user_client.get(f"/posts/{post.id}/comments/")
+    assert response.status_code == 404
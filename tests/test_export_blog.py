@@ -0,0 +1,63 @@
+import gzip
+import json
+from datetime import timedelta
+from io import StringIO
+
+import pytest
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.utils import timezone
+
+from blog.models import Comment, Post
+
+pytestmark = [pytest.mark.django_db]
+
+
+def read_export(path):
+    with gzip.open(path, "rt", encoding="utf-8") as stream:
+        return [json.loads(line) for line in stream]
+
+
+def test_export_round_trip(
+    tmp_path, many_posts_with_published_locations, comment_to_a_post
+):
+    path = tmp_path / "blog.jsonl.gz"
+    call_command("export_blog", str(path), chunk_size=3, stdout=StringIO())
+    records = read_export(path)
+    assert len(records) == Post.objects.count() + Comment.objects.count()
+    assert {record["model"] for record in records} == {
+        "blog.post", "blog.comment"
+    }
+
+    post_count = Post.objects.count()
+    created_at = Comment.objects.get().created_at
+    Post.objects.all().delete()
+    call_command("import_blog", str(path), stdout=StringIO())
+    assert Post.objects.count() == post_count
+    assert Comment.objects.get().created_at == created_at, (
+        "Убедитесь, что экспорт `export_blog` загружается через "
+        "`import_blog` без потерь."
+    )
+
+
+def test_export_since(tmp_path, many_posts_with_published_locations):
+    old = many_posts_with_published_locations[0]
+    Post.objects.filter(pk=old.pk).update(
+        created_at=timezone.now() - timedelta(days=30)
+    )
+    since = (timezone.now() - timedelta(days=1)).date().isoformat()
+    path = tmp_path / "blog.jsonl.gz"
+    call_command(
+        "export_blog", str(path), since=since, models=["posts"],
+        stdout=StringIO(),
+    )
+    exported = {record["pk"] for record in read_export(path)}
+    assert old.pk not in exported
+    assert len(exported) == len(many_posts_with_published_locations) - 1
+
+
+def test_export_invalid_since(tmp_path):
+    with pytest.raises(CommandError):
+        call_command(
+            "export_blog", str(tmp_path / "blog.jsonl.gz"), since="yesterday"
+        )
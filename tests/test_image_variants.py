@@ -0,0 +1,278 @@
+from datetime import timedelta
+from io import BytesIO, StringIO
+
+import pytest
+from django.core.files.storage import FileSystemStorage, default_storage
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.urls import reverse
+from django.utils import timezone
+from PIL import Image
+
+from blog.images import strip_metadata
+from blog.models import Category, ImageJob, Post
+from conftest import run_in_another_process
+
+pytestmark = [pytest.mark.django_db]
+
+
+@pytest.fixture(autouse=True)
+def media_root(settings, tmp_path):
+    settings.MEDIA_ROOT = tmp_path
+    return tmp_path
+
+
+def upload(name="photo.jpg", size=(2000, 1000), exif=b""):
+    data = BytesIO()
+    Image.new("RGB", size, "teal").save(data, "JPEG", exif=exif)
+    return SimpleUploadedFile(name, data.getvalue(), "image/jpeg")
+
+
+def test_variants_on_upload(
+    settings, post_with_published_location, user_client
+):
+    settings.BLOG_IMAGE_PROCESSING = "inline"
+    post = post_with_published_location
+    post.image = upload()
+    post.save()
+    post.refresh_from_db()
+    assert set(post.image_variants) == {"admin", "card", "detail"}
+    detail = post.image_variants["detail"]
+    assert (detail["width"], detail["height"]) == (1280, 640)
+    with default_storage.open(post.image_variants["card"]["name"]) as file:
+        assert Image.open(file).size == (640, 320), (
+            "Убедитесь, что для карточки сохраняется уменьшенная копия фото."
+        )
+
+    content = user_client.get(
+        reverse("blog:post_detail", args=(post.pk,))
+    ).content.decode("utf-8")
+    assert 'width="1280" height="640"' in content
+    assert "640w" in content and "1280w" in content, (
+        "Убедитесь, что фото публикации выводится с атрибутом srcset."
+    )
+
+
+def test_variants_removed(
+    settings, post_with_published_location,
+    django_capture_on_commit_callbacks,
+):
+    settings.BLOG_IMAGE_PROCESSING = "inline"
+    post = post_with_published_location
+    post.image = upload()
+    post.save()
+    first = [variant["name"] for variant in post.image_variants.values()]
+
+    with django_capture_on_commit_callbacks(execute=True):
+        post.image = upload("other.jpg")
+        post.save()
+    assert not any(default_storage.exists(name) for name in first)
+    second = [variant["name"] for variant in post.image_variants.values()]
+    assert all(default_storage.exists(name) for name in second)
+
+    with django_capture_on_commit_callbacks(execute=True):
+        post.delete()
+    assert not any(default_storage.exists(name) for name in second), (
+        "Убедитесь, что уменьшенные копии удаляются вместе с публикацией."
+    )
+
+
+def test_backfill_command(post_with_published_location):
+    post = post_with_published_location
+    post.image = upload(size=(300, 200))
+    post.save()
+    Post.objects.filter(pk=post.pk).update(image_variants={})
+
+    out = StringIO()
+    call_command("generate_image_variants", workers=1, stdout=out)
+    post.refresh_from_db()
+    assert post.image_variants["admin"]["width"] == 150
+    assert post.image_variants["detail"]["width"] == 300
+    assert "Processed 1 images" in out.getvalue()
+
+
+def test_backfill_purges_only_its_posts(
+        mixer, user, unlogged_client, post_with_published_location,
+        django_capture_on_commit_callbacks,
+):
+    post = post_with_published_location
+    post.image = upload()
+    post.save()
+    Post.objects.filter(pk=post.pk).update(image_variants={})
+    category = mixer.blend(Category, is_published=True)
+    other = mixer.blend(
+        Post, author=user, category=category, is_published=True, image="",
+        pub_date=timezone.now() - timedelta(days=1),
+    )
+    other_url = f"/category/{category.slug}/"
+    assert "640w" not in unlogged_client.get("/").content.decode("utf-8")
+    assert other.title in unlogged_client.get(other_url).content.decode()
+    Post.objects.filter(pk=other.pk).update(title="Bypassed signals")
+
+    with django_capture_on_commit_callbacks(execute=True):
+        call_command("generate_image_variants", workers=1, stdout=StringIO())
+    assert "640w" in unlogged_client.get("/").content.decode("utf-8"), (
+        "Убедитесь, что `generate_image_variants` сбрасывает кеш карточек и"
+        " страниц обработанных постов."
+    )
+    assert other.title in unlogged_client.get(other_url).content.decode(), (
+        "Убедитесь, что `generate_image_variants` не очищает весь кеш."
+    )
+
+def test_image_worker(post_with_published_location):
+    post = post_with_published_location
+    post.image = upload()
+    post.save()
+    post.refresh_from_db()
+    assert post.image_variants == {}, (
+        "Убедитесь, что фото обрабатывается вне запроса."
+    )
+    job = ImageJob.objects.get()
+    assert job.image == post.image.name
+
+    post.image = upload("other.jpg")
+    post.save()
+    assert ImageJob.objects.get().image == post.image.name
+
+    out = StringIO()
+    call_command("run_image_worker", workers=1, stdout=out)
+    post.refresh_from_db()
+    assert post.image_variants["card"]["width"] == 640
+    assert not ImageJob.objects.exists()
+    assert "Processed 1 images" in out.getvalue()
+
+
+@pytest.mark.django_db(transaction=True)
+def test_image_worker_strips_original(
+        unlogged_client, post_with_published_location
+):
+    exif = Image.Exif()
+    exif[0x010F] = "Camera"
+    exif[0x8825] = {1: "N", 2: (55.0, 45.0, 0.0)}
+    post = post_with_published_location
+    post.image = upload(size=(1500, 1000), exif=exif.tobytes())
+    post.save()
+    content = unlogged_client.get("/").content.decode("utf-8")
+    assert f'src="{post.image.url}"' in content
+
+    run_in_another_process(
+        call_command, "run_image_worker", workers=1, stdout=StringIO()
+    )
+    with default_storage.open(post.image.name) as file:
+        original = Image.open(file)
+        assert original.size == (1500, 1000)
+        assert "exif" not in original.info and not original.getexif(), (
+            "Убедитесь, что из оригинала фото удаляются данные EXIF."
+        )
+    content = unlogged_client.get("/").content.decode("utf-8")
+    assert "640w" in content, (
+        "Убедитесь, что обработка фото сбрасывает кеш карточек во всех"
+        " процессах."
+    )
+    assert f'href="{post.image.url}"' not in content, (
+        "Убедитесь, что фото публикации ссылается на уменьшенную копию,"
+        " а не на оригинал."
+    )
+
+
+def test_image_worker_failure(post_with_published_location):
+    post = post_with_published_location
+    post.image = upload()
+    post.save()
+    default_storage.delete(post.image.name)
+
+    call_command("run_image_worker", workers=1, stdout=StringIO())
+    job = ImageJob.objects.get()
+    assert (job.status, job.attempts) == (ImageJob.PENDING, 1)
+    call_command(
+        "run_image_worker", workers=1, max_attempts=2, retry_after=0,
+        stdout=StringIO(),
+    )
+    job.refresh_from_db()
+    assert (job.status, job.attempts) == (ImageJob.FAILED, 2), (
+        "Убедитесь, что задача без читаемого фото не повторяется бесконечно."
+    )
+
+
+def test_image_worker_survives_pillow_errors(
+        monkeypatch, post_with_published_location
+):
+    post = post_with_published_location
+    post.image = upload()
+    post.save()
+    monkeypatch.setattr(Image, "MAX_IMAGE_PIXELS", 1000)
+
+    call_command("run_image_worker", workers=1, stdout=StringIO())
+    job = ImageJob.objects.get()
+    assert (job.status, job.attempts) == (ImageJob.PENDING, 1), (
+        "Убедитесь, что ошибка Pillow при обработке фото не останавливает"
+        " обработчик и задача возвращается в очередь."
+    )
+    assert "DecompressionBombError" in job.error
+
+
+def test_image_worker_gives_up_stale_jobs(post_with_published_location):
+    post = post_with_published_location
+    post.image = upload()
+    post.save()
+    ImageJob.objects.update(
+        status=ImageJob.RUNNING, attempts=2,
+        locked_at=timezone.now() - timedelta(hours=1),
+    )
+
+    call_command(
+        "run_image_worker", workers=1, max_attempts=2, stale_after=60,
+        stdout=StringIO(),
+    )
+    job = ImageJob.objects.get()
+    assert (job.status, job.attempts) == (ImageJob.FAILED, 2), (
+        "Убедитесь, что зависшая задача не повторяется сверх max_attempts."
+    )
+    post.refresh_from_db()
+    assert post.image_variants == {}
+
+
+def test_strip_metadata_keeps_original_on_failure(
+        monkeypatch, post_with_published_location
+):
+    post = post_with_published_location
+    exif = Image.Exif()
+    exif[0x010F] = "Camera"
+    post.image = upload(exif=exif.tobytes())
+    post.save()
+    with default_storage.open(post.image.name) as file:
+        original = file.read()
+
+    def fail(*args, **kwargs):
+        raise OSError("No space left on device")
+
+    monkeypatch.setattr(FileSystemStorage, "_save", fail)
+    with pytest.raises(OSError):
+        strip_metadata(post.image.name)
+    monkeypatch.undo()
+    with default_storage.open(post.image.name) as file:
+        assert file.read() == original, (
+            "Убедитесь, что оригинал фото не удаляется, пока не сохранена"
+            " его очищенная копия."
+        )
+
+
+def test_admin_thumbnail(
+    post_with_published_location, django_capture_on_commit_callbacks
+):
+    post = post_with_published_location
+    post.image = upload()
+    post.save()
+
+    tag = post.image_tag()
+    thumbnail = Post.objects.get(pk=post.pk).image_variants["admin"]["name"]
+    assert thumbnail in tag and 'width="150" height="75"' in tag, (
+        "Убедитесь, что в админке выводится уменьшенная копия фото."
+    )
+    assert post.image_tag() == tag
+
+    with django_capture_on_commit_callbacks(execute=True):
+        call_command("run_image_worker", workers=1, stdout=StringIO())
+    post.refresh_from_db()
+    assert post.image_variants["admin"]["name"] != thumbnail
+    assert not default_storage.exists(thumbnail)
@@ -0,0 +1,92 @@
+import gzip
+import json
+from datetime import datetime, timedelta, timezone as dt_timezone
+from io import StringIO
+
+import pytest
+from django.core.management import call_command
+from django.core.management.base import CommandError
+
+from blog.management.commands import import_blog
+from blog.models import Comment, Post
+
+pytestmark = [pytest.mark.django_db]
+
+CREATED_AT = datetime(2022, 12, 18, 23, 6, 18, tzinfo=dt_timezone.utc)
+
+
+def fixture_records():
+    stamp = CREATED_AT.isoformat()
+    future = (datetime.now(dt_timezone.utc) + timedelta(days=1)).isoformat()
+    records = [
+        {"model": "auth.user", "pk": 901, "fields": {
+            "password": "!", "username": "imported", "groups": [],
+            "user_permissions": [],
+        }},
+        {"model": "blog.category", "pk": 901, "fields": {
+            "title": "Категория", "description": "Описание",
+            "slug": "imported", "is_published": True, "created_at": stamp,
+        }},
+        {"model": "sessions.session", "pk": "key", "fields": {
+            "session_data": "", "expire_date": stamp,
+        }},
+    ]
+    for pk, pub_date in ((901, stamp), (902, future)):
+        records.append({"model": "blog.post", "pk": pk, "fields": {
+            "title": "Пост", "text": "Текст", "pub_date": pub_date,
+            "author": 901, "category": 901, "location": None,
+            "is_published": True, "created_at": stamp,
+        }})
+    records.extend(
+        {"model": "blog.comment", "pk": 900 + number, "fields": {
+            "comment": "Комментарий", "post": 901, "author": 901,
+            "created_at": stamp,
+        }}
+        for number in range(1, 4)
+    )
+    return records
+
+
+def check_imported(output):
+    assert Post.objects.filter(pk=901, is_visible=True).exists()
+    assert Post.objects.filter(pk=902, is_visible=False).exists(), (
+        "Убедитесь, что `import_blog` не показывает отложенные публикации."
+    )
+    assert Post.objects.get(pk=901).comment_count == 3
+    assert Comment.objects.filter(created_at=CREATED_AT).count() == 3, (
+        "Убедитесь, что `import_blog` сохраняет даты создания из фикстуры."
+    )
+    assert "sessions.session: 1 skipped" in output
+
+
+def test_import_json_array(tmp_path, monkeypatch):
+    monkeypatch.setattr(import_blog, "READ_CHUNK", 16)
+    path = tmp_path / "blog.json"
+    path.write_text(json.dumps(fixture_records(), indent=2), "utf-8")
+    out = StringIO()
+    call_command("import_blog", str(path), batch_size=2, stdout=out)
+    check_imported(out.getvalue())
+
+
+def test_import_gzipped_jsonl(tmp_path):
+    path = tmp_path / "blog.jsonl.gz"
+    with gzip.open(path, "wt", encoding="utf-8") as stream:
+        for record in fixture_records():
+            stream.write(json.dumps(record) + "\n")
+    out = StringIO()
+    call_command("import_blog", str(path), stdout=out)
+    check_imported(out.getvalue())
+
+
+def test_invalid_json_array_fails_at_once(monkeypatch):
+    monkeypatch.setattr(import_blog, "READ_CHUNK", 16)
+    text = json.dumps(fixture_records() * 50)
+    comma_at = text.index(', "fields"', 100)
+    stream = StringIO(text[:comma_at] + text[comma_at + 1:])
+    # The decoder stops at the quote following the missing comma.
+    with pytest.raises(CommandError, match=f"character {comma_at + 1}:"):
+        list(import_blog.iter_json_array(stream))
+    assert stream.tell() < len(text) // 2, (
+        "Убедитесь, что `import_blog` сообщает об ошибке в JSON сразу, не"
+        " дочитывая файл до конца."
+    )
@@ -0,0 +1,103 @@
+import pytest
+from django.db import transaction
+
+from blog.models import Comment, Post
+from conftest import run_in_another_process
+
+pytestmark = [pytest.mark.django_db]
+
+
+def _content(client, url):
+    response = client.get(url)
+    assert response.status_code == 200
+    return response.content.decode("utf-8")
+
+
+def test_anonymous_pages_are_cached_and_purged(
+        mixer, user, unlogged_client, post_with_published_location,
+        published_category, django_capture_on_commit_callbacks,
+):
+    post = post_with_published_location
+    urls = (
+        "/",
+        f"/category/{published_category.slug}/",
+        f"/profile/{user.username}/",
+    )
+    for url in urls:
+        assert post.title in _content(unlogged_client, url)
+
+    Post.objects.filter(pk=post.pk).update(title="Bypassed signals")
+    for url in urls:
+        assert post.title in _content(unlogged_client, url), (
+            f"Убедитесь, что страница `{url}` для анонимных пользователей"
+            " берётся из кеша."
+        )
+
+    post.refresh_from_db()
+    with django_capture_on_commit_callbacks(execute=True):
+        post.save()
+    for url in urls:
+        assert "Bypassed signals" in _content(unlogged_client, url), (
+            f"Убедитесь, что кеш страницы `{url}` сбрасывается при изменении"
+            " поста."
+        )
+
+    with django_capture_on_commit_callbacks(execute=True):
+        mixer.blend(Comment, post=post, author=user)
+    assert "(1)" in _content(unlogged_client, "/"), (
+        "Убедитесь, что кеш ленты сбрасывается при добавлении комментария."
+    )
+
+    published_category.is_published = False
+    with django_capture_on_commit_callbacks(execute=True):
+        published_category.save()
+    response = unlogged_client.get(urls[1])
+    assert response.status_code == 404, (
+        "Убедитесь, что кеш страницы категории сбрасывается при снятии"
+        " категории с публикации."
+    )
+    assert post.title not in _content(unlogged_client, "/")
+
+
+def test_authenticated_pages_are_not_cached(
+        user_client, post_with_published_location
+):
+    post = post_with_published_location
+    assert post.title in _content(user_client, "/")
+    Post.objects.filter(pk=post.pk).update(is_visible=False)
+    assert post.title not in _content(user_client, "/"), (
+        "Убедитесь, что страницы авторизованных пользователей не кешируются."
+    )
+
+
+def _rename_post(pk, title):
+    post = Post.objects.get(pk=pk)
+    post.title = title
+    post.save()
+
+
+@pytest.mark.django_db(transaction=True)
+def test_purge_reaches_other_processes(
+        unlogged_client, post_with_published_location
+):
+    post = post_with_published_location
+    assert post.title in _content(unlogged_client, "/")
+    run_in_another_process(_rename_post, post.pk, "Renamed elsewhere")
+    assert "Renamed elsewhere" in _content(unlogged_client, "/"), (
+        "Убедитесь, что кеш страниц общий для всех процессов и сброс кеша"
+        " в одном процессе виден в остальных."
+    )
+
+
+@pytest.mark.django_db(transaction=True)
+def test_purge_waits_for_commit(unlogged_client, post_with_published_location):
+    post = post_with_published_location
+    assert post.title in _content(unlogged_client, "/")
+    with transaction.atomic():
+        post.title = "Committed title"
+        post.save()
+        assert post.title not in _content(unlogged_client, "/"), (
+            "Убедитесь, что кеш страниц сбрасывается только после фиксации"
+            " транзакции."
+        )
+    assert post.title in _content(unlogged_client, "/")
@@ -0,0 +1,107 @@
+import pytest
+from django.db import connection
+from django.test import override_settings
+from django.test.utils import CaptureQueriesContext
+
+from conftest import N_PER_PAGE
+
+pytestmark = [pytest.mark.django_db]
+
+
+def _page_ids(response):
+    return [post.id for post in response.context["page_obj"]]
+
+
+def test_keyset_pagination(
+        user_client, many_posts_with_published_locations
+):
+    posts = many_posts_with_published_locations
+    first = user_client.get("/")
+    page_obj = first.context["page_obj"]
+    assert len(page_obj) == N_PER_PAGE
+    assert page_obj.has_next() and not page_obj.has_previous(), (
+        "Убедитесь, что первая страница ленты ссылается только на следующую."
+    )
+
+    second = user_client.get(f"/?after={page_obj.next_cursor}")
+    second_page = second.context["page_obj"]
+    assert len(second_page) == len(posts) - N_PER_PAGE
+    assert not second_page.has_next() and second_page.has_previous()
+    assert not set(_page_ids(first)) & set(_page_ids(second)), (
+        "Убедитесь, что страницы ленты по курсору не пересекаются."
+    )
+    expected = sorted(posts, key=lambda p: (p.pub_date, p.id), reverse=True)
+    assert _page_ids(first) + _page_ids(second) == [p.id for p in expected]
+
+    back = user_client.get(f"/?before={second_page.previous_cursor}")
+    assert _page_ids(back) == _page_ids(first), (
+        "Убедитесь, что переход назад по курсору возвращает предыдущую"
+        " страницу."
+    )
+
+
+def test_keyset_pagination_bad_cursor(
+        user_client, many_posts_with_published_locations
+):
+    response = user_client.get("/?after=not-a-cursor")
+    assert response.status_code == 200
+    assert len(response.context["page_obj"]) == N_PER_PAGE
+
+
+@override_settings(BLOG_PAGINATION_MODE="numbered")
+def test_numbered_pagination(
+        user_client, many_posts_with_published_locations
+):
+    response = user_client.get("/?page=2")
+    page_obj = response.context["page_obj"]
+    assert page_obj.number == 2
+    assert page_obj.paginator.count == len(
+        many_posts_with_published_locations
+    )
+
+
+def _count_queries(client, url):
+    with CaptureQueriesContext(connection) as ctx:
+        response = client.get(url)
+    assert response.status_code == 200
+    return [q for q in ctx.captured_queries if "COUNT(" in q["sql"]]
+
+
+@override_settings(BLOG_PAGINATION_MODE="numbered")
+def test_numbered_pagination_count_is_cached(
+        mixer, user, user_client, many_posts_with_published_locations,
+        published_category, django_capture_on_commit_callbacks,
+):
+    urls = (
+        "/",
+        f"/category/{published_category.slug}/",
+        f"/profile/{user.username}/",
+    )
+    for url in urls:
+        assert _count_queries(user_client, url)
+        assert not _count_queries(user_client, url), (
+            f"Убедитесь, что число публикаций на странице `{url}` берётся"
+            " из кеша."
+        )
+
+    post = many_posts_with_published_locations[0]
+    post.title = "Edited"
+    with django_capture_on_commit_callbacks(execute=True):
+        post.save()
+    for url in urls:
+        assert _count_queries(user_client, url), (
+            "Убедитесь, что кеш числа публикаций сбрасывается при изменении"
+            " поста."
+        )
+
+    published_category.description = "Edited"
+    with django_capture_on_commit_callbacks(execute=True):
+        published_category.save()
+    response = user_client.get("/?page=2")
+    assert response.context["page_obj"].paginator.count == len(
+        many_posts_with_published_locations
+    )
+    assert _count_queries(user_client, f"/profile/{user.username}/"), (
+        "Убедитесь, что кеш числа публикаций сбрасывается при изменении"
+        " категории."
+    )
@@ -0,0 +1,56 @@
+import pytest
+from django.db import transaction
+
+from blog.caching import render_post_cards
+from blog.models import Category, Post
+
+pytestmark = [pytest.mark.django_db]
+
+
+def test_post_cards_are_cached(
+        user_client, post_with_published_location, published_category
+):
+    post = post_with_published_location
+    assert post.title in user_client.get("/").content.decode("utf-8")
+
+    Post.objects.filter(pk=post.pk).update(title="Bypassed signals")
+    content = user_client.get("/").content.decode("utf-8")
+    assert post.title in content, (
+        "Убедитесь, что карточки постов берутся из кеша."
+    )
+
+    post.refresh_from_db()
+    post.title = "Saved title"
+    post.save()
+    content = user_client.get("/").content.decode("utf-8")
+    assert "Saved title" in content, (
+        "Убедитесь, что кеш карточки сбрасывается при изменении поста."
+    )
+
+    Category.objects.filter(pk=published_category.pk).update(
+        title="Updated category"
+    )
+    published_category.refresh_from_db()
+    published_category.save()
+    content = user_client.get("/").content.decode("utf-8")
+    assert "Updated category" in content, (
+        "Убедитесь, что кеш карточки сбрасывается при изменении категории."
+    )
+
+
+@pytest.mark.django_db(transaction=True)
+def test_cards_rendered_before_commit_are_retired(
+        user_client, post_with_published_location
+):
+    post = post_with_published_location
+    stale = Post.objects.get(pk=post.pk)
+    with transaction.atomic():
+        post.title = "Committed title"
+        post.save()
+        # A request that read the post before the save renders its card.
+        render_post_cards([stale])
+    content = user_client.get("/").content.decode("utf-8")
+    assert "Committed title" in content, (
+        "Убедитесь, что версия карточки меняется и после фиксации"
+        " транзакции."
+    )
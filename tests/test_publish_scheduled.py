@@ -0,0 +1,78 @@
+from datetime import timedelta
+
+import pytest
+from django.core.management import call_command
+from django.utils import timezone
+
+from blog.models import Post
+from conftest import run_in_another_process
+
+pytestmark = [pytest.mark.django_db]
+
+
+def test_publish_scheduled(
+        mixer, user, unlogged_client, published_category,
+        django_capture_on_commit_callbacks,
+):
+    post = mixer.blend(
+        Post,
+        author=user,
+        category=published_category,
+        pub_date=timezone.now() + timedelta(days=1),
+    )
+    assert not post.is_visible
+    assert post.title not in unlogged_client.get("/").content.decode()
+
+    Post.objects.filter(pk=post.pk).update(
+        pub_date=timezone.now() - timedelta(minutes=1)
+    )
+    assert post.title not in unlogged_client.get("/").content.decode(), (
+        "Убедитесь, что лента опирается на сохранённый признак видимости."
+    )
+
+    with django_capture_on_commit_callbacks(execute=True):
+        call_command("publish_scheduled")
+    post.refresh_from_db()
+    assert post.is_visible, (
+        "Убедитесь, что команда `publish_scheduled` открывает отложенные"
+        " посты, дата публикации которых наступила."
+    )
+    assert post.title in unlogged_client.get("/").content.decode(), (
+        "Убедитесь, что публикация по расписанию сбрасывает кеш ленты."
+    )
+
+
+@pytest.mark.django_db(transaction=True)
+def test_publish_scheduled_purges_other_processes(
+        mixer, user, unlogged_client, published_category
+):
+    post = mixer.blend(
+        Post,
+        author=user,
+        category=published_category,
+        pub_date=timezone.now() + timedelta(days=1),
+    )
+    url = f"/category/{published_category.slug}/"
+    assert post.title not in unlogged_client.get(url).content.decode()
+    Post.objects.filter(pk=post.pk).update(
+        pub_date=timezone.now() - timedelta(minutes=1)
+    )
+
+    run_in_another_process(call_command, "publish_scheduled")
+    assert post.title in unlogged_client.get(url).content.decode(), (
+        "Убедитесь, что команда `publish_scheduled`, запущенная отдельным"
+        " процессом, сбрасывает кеш страниц сайта."
+    )
+
+
+def test_loaded_posts_are_visible(settings):
+    call_command(
+        "loaddata", settings.BASE_DIR / "db.json", verbosity=0
+    )
+    assert Post.objects.filter(is_visible=True).exists(), (
+        "Убедитесь, что посты, загруженные командой `loaddata`, видны в"
+        " ленте без запуска `publish_scheduled`."
+    )
+    assert not Post.objects.filter(
+        is_published=True, is_visible=False, pub_date__lte=timezone.now()
+    ).exists()
@@ -0,0 +1,93 @@
+import pytest
+
+pytestmark = [pytest.mark.django_db]
+
+DETAIL_QUERIES_ANONYMOUS = 2
+DETAIL_QUERIES_AUTHENTICATED = DETAIL_QUERIES_ANONYMOUS + 2
+
+
+@pytest.mark.parametrize(
+    ("client_fixture", "budget"),
+    [
+        ("unlogged_client", DETAIL_QUERIES_ANONYMOUS),
+        ("user_client", DETAIL_QUERIES_AUTHENTICATED),
+    ],
+)
+def test_post_detail_query_budget(
+        request, client_fixture, budget, mixer, user, another_user,
+        comment_to_a_post, django_assert_num_queries,
+):
+    client = request.getfixturevalue(client_fixture)
+    post = comment_to_a_post.post
+    mixer.cycle(3).blend("blog.Comment", post=post, author=another_user)
+    with django_assert_num_queries(budget):
+        response = client.get(f"/posts/{post.id}/")
+    assert response.status_code == 200
+
+
+# Session and user lookups, then the edited object loaded exactly once.
+OWNER_VIEW_QUERIES = 3
+# The post form also lists categories and locations.
+POST_FORM_QUERIES = OWNER_VIEW_QUERIES + 2
+# The delete confirmation shows the post location.
+POST_DELETE_QUERIES = OWNER_VIEW_QUERIES + 1
+
+
+@pytest.mark.parametrize(
+    ("url_template", "budget"),
+    [
+        ("/posts/{post.id}/edit/", POST_FORM_QUERIES),
+        ("/posts/{post.id}/delete/", POST_DELETE_QUERIES),
+        (
+            "/posts/{post.id}/edit_comment/{comment.id}",
+            OWNER_VIEW_QUERIES,
+        ),
+        (
+            "/posts/{post.id}/delete_comment/{comment.id}/",
+            OWNER_VIEW_QUERIES,
+        ),
+    ],
+)
+def test_owner_views_load_object_once(
+        url_template, budget, mixer, user, user_client,
+        post_with_published_location, django_assert_num_queries,
+):
+    post = post_with_published_location
+    comment = mixer.blend("blog.Comment", post=post, author=user)
+    url = url_template.format(post=post, comment=comment)
+    with django_assert_num_queries(budget):
+        response = user_client.get(url)
+    assert response.status_code == 200
+
+
+def test_comment_of_another_post_is_not_found(
+        mixer, user, user_client, post_with_published_location,
+        post_of_another_author,
+):
+    comment = mixer.blend(
+        "blog.Comment", post=post_with_published_location, author=user
+    )
+    response = user_client.get(
+        f"/posts/{post_of_another_author.id}/edit_comment/{comment.id}"
+    )
+    assert response.status_code == 404
+
+
+@pytest.mark.parametrize(
+    ("client_fixture", "budget"),
+    [
+        # One user lookup and one page of posts.
+        ("unlogged_client", 2),
+        # The owner is the session user: no lookup beyond the session.
+        ("user_client", 3),
+    ],
+)
+def test_profile_looks_up_user_once(
+        request, client_fixture, budget, user, post_with_published_location,
+        django_assert_num_queries,
+):
+    client = request.getfixturevalue(client_fixture)
+    with django_assert_num_queries(budget):
+        response = client.get(f"/profile/{user.username}/")
+    assert response.status_code == 200
+    assert response.context["profile"] == user
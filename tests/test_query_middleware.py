@@ -0,0 +1,35 @@
+import pytest
+from django.test import override_settings
+
+from blog.middleware import QueryBudgetExceeded
+
+pytestmark = [pytest.mark.django_db]
+
+
+def test_server_timing_header(user_client, post_with_published_location):
+    response = user_client.get("/")
+    assert "Server-Timing" in response, (
+        "Убедитесь, что ответ содержит заголовок `Server-Timing`."
+    )
+    assert 'desc="3 queries"' in response["Server-Timing"]
+
+
+@override_settings(
+    BLOG_QUERY_BUDGETS={"blog:index": 0}, BLOG_QUERY_BUDGET_ACTION="raise"
+)
+def test_query_budget_raises(unlogged_client, post_with_published_location):
+    with pytest.raises(QueryBudgetExceeded):
+        unlogged_client.get("/")
+
+
+@override_settings(BLOG_QUERY_BUDGETS={"blog:index": 0})
+def test_query_budget_logs(
+        caplog, unlogged_client, post_with_published_location
+):
+    with caplog.at_level("INFO", logger="blog.queries"):
+        response = unlogged_client.get("/")
+    assert response.status_code == 200
+    assert any(
+        record.levelname == "WARNING" and "blog:index" in record.message
+        for record in caplog.records
+    ), "Убедитесь, что превышение бюджета запросов попадает в лог."
@@ -0,0 +1,52 @@
+import re
+
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+pytestmark = [pytest.mark.django_db]
+
+FULL_SCAN = re.compile(
+    r"\bSCAN (TABLE )?(blog_post|blog_comment)\b(?! USING)"
+    r"|USE TEMP B-TREE FOR ORDER BY"
+)
+
+
+def _full_scans(client, url):
+    with CaptureQueriesContext(connection) as ctx:
+        response = client.get(url)
+    assert response.status_code == 200
+    scans = []
+    with connection.cursor() as cursor:
+        for query in ctx.captured_queries:
+            sql = query["sql"]
+            if not sql.startswith("SELECT") or not re.search(
+                r"\b(blog_post|blog_comment)\b", sql
+            ):
+                continue
+            cursor.execute(f"EXPLAIN QUERY PLAN {sql}")
+            for row in cursor.fetchall():
+                if FULL_SCAN.search(row[-1]):
+                    scans.append((sql, row[-1]))
+    return scans
+
+
+@pytest.mark.parametrize(
+    "url_name", ["index", "category", "profile", "detail"]
+)
+def test_feed_queries_use_indexes(
+        url_name, user_client, user, comment_to_a_post,
+        many_posts_with_published_locations, published_category,
+):
+    post = comment_to_a_post.post
+    url = {
+        "index": "/",
+        "category": f"/category/{published_category.slug}/",
+        "profile": f"/profile/{user.username}/",
+        "detail": f"/posts/{post.id}/",
+    }[url_name]
+    scans = _full_scans(user_client, url)
+    assert not scans, (
+        f"Убедитесь, что запросы страницы `{url}` используют индексы, а не"
+        f" полный просмотр таблицы: {scans}"
+    )
@@ -0,0 +1,141 @@
+import os
+import sqlite3
+import time
+from contextlib import ExitStack
+
+import pytest
+from django.core.cache import cache
+from django.db import connections
+from django.urls import reverse
+
+from blog.models import Post
+from blog.replica import PIN_COOKIE, ReplicaRouter, sync_replica
+
+pytestmark = [
+    pytest.mark.django_db(transaction=True, databases=["default", "replica"])
+]
+
+
+@pytest.fixture
+def replica(settings, tmp_path):
+    settings.BLOG_USE_REPLICA = True
+    settings.BLOG_REPLICA_SYNCED_MARKER = tmp_path / "synced"
+    return settings.BLOG_REPLICA_SYNCED_MARKER
+
+
+def mark_synced(marker, at):
+    marker.touch()
+    os.utime(marker, (at, at))
+
+
+def queries_by_alias(client, url):
+    counts = {"default": 0, "replica": 0}
+
+    def counter(alias):
+        def wrapper(execute, sql, params, many, context):
+            counts[alias] += 1
+            return execute(sql, params, many, context)
+        return wrapper
+
+    with ExitStack() as stack:
+        for alias in counts:
+            stack.enter_context(
+                connections[alias].execute_wrapper(counter(alias))
+            )
+        response = client.get(url)
+    assert response.status_code == 200
+    return counts
+
+
+def test_router_sends_writes_and_migrations_to_default():
+    router = ReplicaRouter()
+    assert router.db_for_read(Post) is None
+    assert router.db_for_write(Post) == "default"
+    assert router.allow_migrate("replica", "blog") is False
+    assert router.allow_migrate("default", "blog")
+
+
+def test_read_only_pages_read_from_synced_replica(
+        replica, unlogged_client, post_with_published_location
+):
+    post = post_with_published_location
+    urls = (
+        reverse("blog:index"),
+        reverse("blog:post_detail", args=(post.pk,)),
+        reverse("blog:profile", args=(post.author.username,)),
+        reverse("blog:category_posts", args=(post.category.slug,)),
+    )
+    for url in urls:
+        assert queries_by_alias(unlogged_client, url)["replica"] == 0, (
+            "Убедитесь, что реплика не используется до первой синхронизации."
+        )
+
+    cache.clear()
+    mark_synced(replica, time.time())
+    for url in urls:
+        counts = queries_by_alias(unlogged_client, url)
+        assert counts["replica"] and not counts["default"], (
+            f"Убедитесь, что страница `{url}` читает данные из реплики."
+        )
+
+
+def test_reads_after_write_stick_to_default(
+        replica, user_client, post_with_published_location
+):
+    post = post_with_published_location
+    url = reverse("blog:post_detail", args=(post.pk,))
+    mark_synced(replica, time.time() - 60)
+    assert queries_by_alias(user_client, url)["replica"]
+
+    response = user_client.post(
+        reverse("blog:add_comment", args=(post.pk,)), {"comment": "Новый"}
+    )
+    assert response.status_code == 302
+    assert PIN_COOKIE in response.cookies
+    counts = queries_by_alias(user_client, url)
+    assert counts["default"] and not counts["replica"], (
+        "Убедитесь, что после записи пользователь читает из основной базы,"
+        " пока реплика не синхронизирована."
+    )
+
+    mark_synced(replica, time.time())
+    assert queries_by_alias(user_client, url)["replica"]
+
+
+def test_sync_replica_copies_database(
+        tmp_path, post_with_published_location
+):
+    target = tmp_path / "replica.sqlite3"
+    marker = tmp_path / "synced"
+    started_at = sync_replica(target=target, marker=marker)
+    assert os.stat(marker).st_mtime == pytest.approx(started_at)
+    copy = sqlite3.connect(target)
+    try:
+        titles = copy.execute("SELECT title FROM blog_post").fetchall()
+    finally:
+        copy.close()
+    assert titles == [(post_with_published_location.title,)], (
+        "Убедитесь, что `sync_replica` копирует основную базу в реплику."
+    )
+
+
+def test_renders_older_than_the_write_are_not_cached(
+        replica, user_client, unlogged_client, post_with_published_location
+):
+    post = post_with_published_location
+    mark_synced(replica, time.time() - 60)
+    post.title = "Edited"
+    post.save()
+    for client in (user_client, unlogged_client):
+        assert queries_by_alias(client, "/")["replica"]
+
+    # The sync that brings the edit to the replica.
+    Post.objects.filter(pk=post.pk).update(title="Synced")
+    mark_synced(replica, time.time())
+    for client in (user_client, unlogged_client):
+        content = client.get("/").content.decode("utf-8")
+        assert "Synced" in content, (
+            "Убедитесь, что страницы и карточки, прочитанные из реплики"
+            " старше последней записи, не сохраняются в кеш."
+        )
+    assert not sum(queries_by_alias(unlogged_client, "/").values())
@@ -0,0 +1,85 @@
+from io import StringIO
+
+import pytest
+from django.core.management import call_command
+from django.db import connection
+from django.urls import reverse
+
+from blog.models import Post
+from blog.search import FTS_TABLE
+
+pytestmark = [pytest.mark.django_db]
+
+
+def search(client, query, **params):
+    response = client.get(reverse("blog:search"), {"q": query, **params})
+    assert response.status_code == 200
+    return response.context["page_obj"]
+
+
+def test_search_ranked_and_visible(
+    client, many_posts_with_published_locations, posts_with_unpublished_category
+):
+    best, other, hidden, third = many_posts_with_published_locations[:4]
+    Post.objects.filter(pk=best.pk).update(title="Зимний лес")
+    Post.objects.filter(pk=other.pk).update(text="Прогулка: зимний парк")
+    Post.objects.filter(pk=hidden.pk).update(title="Зимний сад")
+    Post.objects.filter(pk=hidden.pk).update(is_visible=False)
+    Post.objects.filter(
+        pk=posts_with_unpublished_category[0].pk
+    ).update(title="Зимний вечер")
+    Post.objects.filter(pk=third.pk).update(text="зимнее утро")
+
+    found = [post.pk for post in search(client, "ЗИМН")]
+    assert found[0] == best.pk and sorted(found[1:]) == sorted(
+        [other.pk, third.pk]
+    ), (
+        "Убедитесь, что поиск находит только видимые публикации и ставит "
+        "совпадения в заголовке выше совпадений в тексте."
+    )
+    assert [post.pk for post in search(client, "зимний лес")] == [best.pk]
+    assert [
+        post.pk for post in search(client, 'лес" (ЗИМНИЙ')
+    ] == [best.pk]
+    assert list(search(client, '"( *')) == []
+
+
+def test_search_keyset_pages(client, mixer, published_category, user):
+    posts = mixer.cycle(15).blend(
+        "blog.Post", author=user, category=published_category,
+        title="Осенний день", text=mixer.RANDOM,
+    )
+    first = search(client, "осенний")
+    assert len(first) == 10 and first.has_next()
+    second = search(client, "осенний", after=first.next_cursor)
+    assert not second.has_next()
+    assert {post.pk for post in [*first, *second]} == {
+        post.pk for post in posts
+    }, "Убедитесь, что результаты поиска разбиты на страницы без повторов."
+    content = client.get(
+        reverse("blog:search"), {"q": "осенний"}
+    ).content.decode("utf-8")
+    assert f"q=%D0%BE%D1%81%D0%B5%D0%BD%D0%BD%D0%B8%D0%B9&amp;after=" in (
+        content
+    )
+
+
+def test_rebuild_search_index(client, post_with_published_location):
+    post = post_with_published_location
+    Post.objects.filter(pk=post.pk).update(title="Потерянный")
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"INSERT INTO {FTS_TABLE}({FTS_TABLE}) VALUES ('delete-all')"
+        )
+    assert list(search(client, "потерянный")) == []
+    call_command("rebuild_search_index", stdout=StringIO())
+    assert [found.pk for found in search(client, "потерянный")] == [post.pk]
+
+
+def test_admin_search(admin_client, post_with_published_location):
+    post = post_with_published_location
+    Post.objects.filter(pk=post.pk).update(text="Редкое слово")
+    response = admin_client.get(
+        reverse("admin:blog_post_changelist"), {"q": "редк"}
+    )
+    assert list(response.context["cl"].result_list) == [post]
@@ -0,0 +1,60 @@
+from datetime import timedelta
+from io import StringIO
+from unittest import mock
+
+import pytest
+from django.core.management import call_command
+from django.db.models import Count, F, Sum
+from django.utils import timezone
+
+from blog.models import Category, Comment, Post, User
+
+pytestmark = [pytest.mark.django_db]
+
+
+def test_seed_blog():
+    call_command(
+        "seed_blog", users=5, categories=3, locations=2, posts=40,
+        comments=200, batch_size=7, stdout=StringIO(),
+    )
+    assert Post.objects.count() == 40
+    assert Post.objects.aggregate(total=Sum("comment_count"))["total"] == (
+        Comment.objects.count()
+    )
+    assert not Post.objects.annotate(
+        actual=Count("comments")
+    ).exclude(actual=F("comment_count")).exists(), (
+        "Убедитесь, что `seed_blog` сохраняет верные счётчики комментариев."
+    )
+    assert not Post.objects.filter(
+        is_visible=True, pub_date__gt=timezone.now()
+    ).exists()
+    assert not Post.objects.filter(
+        is_visible=True, is_published=False
+    ).exists()
+
+
+def test_seed_blog_is_deterministic():
+    def seed():
+        call_command(
+            "seed_blog", users=5, categories=3, locations=2, posts=40,
+            comments=200, batch_size=7, stdout=StringIO(),
+        )
+        rows = list(Post.objects.order_by("pk").values_list(
+            "title", "text", "pub_date", "author__username",
+            "author__password", "category__slug", "is_published",
+            "comment_count",
+        ))
+        User.objects.filter(username__startswith="seed_").delete()
+        Category.objects.filter(slug__startswith="seed-").delete()
+        return rows
+
+    first = seed()
+    with mock.patch(
+        "django.utils.timezone.now",
+        return_value=timezone.now() + timedelta(days=3),
+    ):
+        assert seed() == first, (
+            "Убедитесь, что `seed_blog` с теми же seed и объёмами создаёт те"
+            " же данные в любой день."
+        )
@@ -0,0 +1,34 @@
+import pytest
+from django.db import connection
+
+from blog import benchmarks
+
+pytestmark = [pytest.mark.django_db]
+
+
+def test_connection_profile_applied(settings):
+    pragmas = settings.BLOG_SQLITE_PRAGMAS
+    with connection.cursor() as cursor:
+        for name in ("busy_timeout", "cache_size"):
+            cursor.execute(f"PRAGMA {name}")
+            assert cursor.fetchone()[0] == pragmas[name], (
+                f"Убедитесь, что `PRAGMA {name}` выполняется при открытии"
+                " соединения с SQLite."
+            )
+        cursor.execute("PRAGMA temp_store")
+        assert cursor.fetchone()[0] == 2
+
+
+@pytest.mark.benchmark
+@pytest.mark.django_db(transaction=True)
+def test_sqlite_throughput_profiles(post_with_published_location):
+    results = benchmarks.sqlite_throughput(
+        duration=0.2, readers=2, writers=2
+    )
+    assert set(results) == set(benchmarks.SQLITE_PROFILES)
+    for name, row in results.items():
+        assert row["reads"]["per_second"] > 0, f"{name}: {row}"
+        assert row["writes"]["per_second"] > 0, f"{name}: {row}"
+    assert post_with_published_location.comments.count() == 0, (
+        "Убедитесь, что бенчмарк пишет в копию базы данных."
+    )
@@ -0,0 +1,93 @@
+import pytest
+from django.db import IntegrityError
+from django.urls import reverse
+
+from blog import benchmarks, write_queue
+from blog.models import Comment
+from blog.write_queue import CommentWriter, writer
+
+pytestmark = [pytest.mark.django_db(transaction=True)]
+
+
+def test_comment_view_writes_through_queue(
+        user_client, post_with_published_location
+):
+    post = post_with_published_location
+    written = writer.written
+    response = user_client.post(
+        reverse("blog:add_comment", args=(post.pk,)), {"comment": "В очередь"}
+    )
+    assert response.status_code == 302
+    assert writer.written == written + 1, (
+        "Убедитесь, что комментарий записывается через очередь записи."
+    )
+    post.refresh_from_db()
+    assert post.comment_count == 1
+    assert post.comments.get().comment == "В очередь"
+
+
+def test_writer_batches_and_isolates_failures(
+        user, post_with_published_location
+):
+    post = post_with_published_location
+    queued = CommentWriter(maxsize=10)
+    queued.start = lambda: None
+    futures = [
+        queued.submit(Comment(comment=f"{i}", post=post, author=user))
+        for i in range(3)
+    ]
+    broken = queued.submit(
+        Comment(comment="broken", post_id=100500, author=user)
+    )
+    futures.append(
+        queued.submit(Comment(comment="late", post=post, author=user))
+    )
+    CommentWriter.start(queued)
+    for future in futures:
+        assert future.result(5) is None
+    with pytest.raises(IntegrityError):
+        broken.result(5)
+    post.refresh_from_db()
+    assert post.comment_count == 4 == post.comments.count(), (
+        "Убедитесь, что комментарии из очереди записываются вместе со"
+        " счётчиком, а ошибка одного не мешает остальным."
+    )
+    assert queued.written == 4
+
+
+def test_full_queue_falls_back_to_direct_save(
+        monkeypatch, user, post_with_published_location
+):
+    post = post_with_published_location
+    queued = CommentWriter(maxsize=1)
+    queued.start = lambda: None
+    monkeypatch.setattr(write_queue, "writer", queued)
+    assert queued.submit(Comment(comment="1", post=post, author=user))
+    write_queue.save_comment(Comment(comment="2", post=post, author=user))
+    post.refresh_from_db()
+    assert post.comment_count == 1 and post.comments.get().comment == "2", (
+        "Убедитесь, что при переполненной очереди комментарий сохраняется"
+        " напрямую."
+    )
+
+
+@pytest.mark.benchmark
+def test_comment_throughput_leaves_database_alone(
+        user, post_with_published_location
+):
+    post = post_with_published_location
+    comment = Comment.objects.create(
+        comment=benchmarks.BENCHMARK_COMMENT, post=post, author=user
+    )
+    results = benchmarks.comment_throughput(duration=0.2, clients=2)
+    assert set(results) == set(benchmarks.COMMENT_MODES)
+    for mode, row in results.items():
+        assert row["per_second"] > 0, f"{mode}: {row}"
+    assert results["queued"]["per_batch"] >= 1
+    post.refresh_from_db()
+    assert post.comment_count == 1
+    assert list(Comment.objects.all()) == [comment], (
+        "Убедитесь, что замер комментариев пишет в копию базы и не трогает"
+        " комментарии сайта."
+    )
+    assert write_queue.writer is writer